@@ -0,0 +1,297 @@
+"""This is the python module for running a batch of cases, e.g. a sweep over Reynolds numbers and beam geometries.
+The cases are solved without plotting, and the solution grids and errors are returned.
+Larger grids are solved in parallel with run_batch, while many small grids are solved together with run_stacked.
+"""
+
+#Please note the module folders must be in the same folder as this Batch file for the imports to run, or installed,
+#as for the Results file.
+
+
+from Results_File import solve
+from Init_module.Initialising_functions import initialise
+from Upd_module.Updating_functions import get_beam, tune_relaxation, check_divergence, damp_relaxation
+from Upd_module.Stacked_functions import get_beam_points, apply_sweep_stacked
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import os
+import sys
+
+
+def get_key(value):
+    """This function gives a hashable form of the value of an argument, so cases can be grouped by their arguments.
+    Lists, e.g. of the rectangles of obstacles, become tuples, and arrays, e.g. solid masks, become their shape and
+    bytes.
+
+    Args:
+        value: The value of an argument for solve.
+
+    Returns:
+        key: A hashable value equal for equal arguments.
+
+    """
+    if isinstance(value, np.ndarray):
+        return (value.shape, value.dtype.str, value.tobytes())
+
+    if isinstance(value, (list, tuple)):
+        return tuple(get_key(item) for item in value)
+
+    return value
+
+
+def get_chains(cases):
+    """This function groups the cases into chains that differ only in their Reynolds number.
+    Each chain is sorted by increasing Reynolds number, so each case can start from the solution of the one before.
+
+    Args:
+        cases: List of dictionaries of arguments for solve, one for each case.
+
+    Returns:
+        chains: List of chains, each a list of indices into cases, with the longest chains first.
+
+    """
+    chains = {}
+    for index, case in enumerate(cases):
+        key = tuple(sorted((name, get_key(value)) for name, value in case.items() if name != 'Rey'))
+        chains.setdefault(key, []).append(index)
+
+    chains = [sorted(chain, key=lambda index: cases[index]['Rey']) for chain in chains.values()]
+
+    # Start the longest chains first so they do not hold up the end of the batch
+    chains.sort(key=len, reverse=True)
+
+    return chains
+
+
+def run_chain(cases):
+    """This function solves a chain of cases in turn, starting each case from the solution of the one before.
+    The relaxation factors the case ended with are carried on too, as the tuned factors suit the warm start.
+    A case that does not converge is not used as a starting point, the next case starts from the initialised grids
+    instead. This includes a case that diverged and gave up, as solve then returns its last good grids, which are
+    finite but not a solution.
+
+    Args:
+        cases: List of dictionaries of arguments for solve, sorted by increasing Reynolds number.
+
+    Returns:
+        results: List of dictionaries, one for each case, holding the padded solution grids 'S' and 'W', the axes
+            'x' and 'y', the beam indices 'beamfront', 'beamback' and 'beamtop', and the errors 'S_err' and 'W_err'.
+
+    """
+    results = []
+    initial = None
+    relax = {}
+
+    for case in cases:
+        S, W, x, y, beamfront, beamback, beamtop, S_err, W_err, relax_S, relax_W = solve(**dict(case, **relax),
+                                                                                         initial=initial)
+        results.append({'S': S, 'W': W, 'x': x, 'y': y, 'beamfront': beamfront, 'beamback': beamback,
+                        'beamtop': beamtop, 'S_err': S_err, 'W_err': W_err})
+
+        if S_err[-1] <= case['tol'] and W_err[-1] <= case['tol']:
+            initial = (S, W)
+            relax = {'relax_S': relax_S, 'relax_W': relax_W}
+        else:
+            initial = None
+            relax = {}
+
+    return results
+
+
+def limit_threads():
+    """This function limits each worker process to one Numba thread, so the workers do not compete for cores.
+    Numba is not imported here, so workers using the 'numpy' backend do not pay its import time.
+    """
+    if 'numba' in sys.modules:
+        sys.modules['numba'].set_num_threads(1)
+    else:
+        os.environ['NUMBA_NUM_THREADS'] = '1'
+
+
+def run_batch(cases, settings, workers=None):
+    """This function solves a batch of cases in parallel, with one chain of cases at a time on each worker process.
+    The chains are independent, so the batch scales with the number of workers up to the number of chains.
+
+    Args:
+        cases: List of dictionaries of the arguments for solve that vary between cases, e.g. Rey and start_beam_at.
+        settings: Dictionary of the arguments for solve that are the same for every case.
+        workers: The number of worker processes, defaults to the number of cores.
+
+    Returns:
+        results: List of dictionaries of results from run_chain, in the same order as cases.
+
+    """
+    cases = [dict(settings, **case) for case in cases]
+    chains = get_chains(cases)
+
+    results = [None]*len(cases)
+    with ProcessPoolExecutor(max_workers=workers, initializer=limit_threads) as pool:
+        futures = [pool.submit(run_chain, [cases[index] for index in chain]) for chain in chains]
+
+        for chain, future in zip(chains, futures):
+            for index, result in zip(chain, future.result()):
+                results[index] = result
+
+    return results
+
+
+def run_stack(cases):
+    """This function solves a batch of cases on the same grid together, as one stack of grids of shape (K,nx,ny).
+    Each sweep updates every grid in the stack at once with red-black ordering, which saves the overhead of
+    sweeping small grids one at a time. Each case stops as soon as its own errors are within its tol, and is then
+    removed from the stack. A case that diverges is rolled back to its last good grids and damped as in solve, and is
+    removed from the stack once it runs out of restarts, so its solution is the same as solving it on its own with
+    solve and red-black ordering.
+
+    Args:
+        cases: List of dictionaries of arguments for solve with the same n. Only the arguments n, Rey, val_S, val_W,
+            max_sweeps, tol, start_beam_at, prop_width, prop_height, relax_S, relax_W, auto_relax, max_restarts and
+            guard_every are used.
+
+    Returns:
+        results: List of dictionaries of results, as from run_chain, in the same order as cases.
+
+    """
+    n = cases[0]['n']
+    max_sweeps = max(case['max_sweeps'] for case in cases)
+
+    # Initialise the grids of each case and stack them
+    grids = [initialise(n, case['Rey'], case['val_S'], case['val_W']) for case in cases]
+    S = np.stack([grid[0] for grid in grids])
+    W = np.stack([grid[1] for grid in grids])
+    R = np.array([grid[2] for grid in grids]).reshape(-1, 1, 1)
+    x, y, h = grids[0][3:]
+
+    beams = np.array([get_beam(case['start_beam_at'], case['prop_width'], case['prop_height'], x, y)
+                      for case in cases])
+    relax_S = np.array([case.get('relax_S', 1) for case in cases], dtype=float).reshape(-1, 1, 1)
+    relax_W = np.array([case.get('relax_W', 1) for case in cases], dtype=float).reshape(-1, 1, 1)
+
+    # The cases still iterating, as indices into cases
+    active = np.arange(len(cases))
+    points = get_beam_points(*beams.T)
+
+    S_history = np.empty_like(S)
+    W_history = np.empty_like(W)
+
+    # Keep a copy of the last good state of each case to roll back to if its sweeps diverge, as in solve
+    S_good, W_good = S.copy(), W.copy()
+    good_k = np.zeros(len(cases), dtype=int)
+    best_err = np.full(len(cases), np.inf)
+    restarts = np.zeros(len(cases), dtype=int)
+
+    S_err = [[] for case in cases]
+    W_err = [[] for case in cases]
+    results = [None]*len(cases)
+
+    for k in range(max_sweeps):
+
+        # Take snapshots
+        S_history[:] = S[:]
+        W_history[:] = W[:]
+
+        S, W = apply_sweep_stacked(S, W, R[active], n, h, points, relax_S[active], relax_W[active])
+
+        # Find residual errors of each grid
+        finished = np.zeros(len(active), dtype=bool)
+        for index, case in enumerate(active):
+            S_residual_err = np.linalg.norm(S[index]-S_history[index])/np.linalg.norm(S[index])
+            W_residual_err = np.linalg.norm(W[index]-W_history[index])/np.linalg.norm(W[index])
+            S_err[case].append(S_residual_err)
+            W_err[case].append(W_residual_err)
+
+            tol = cases[case]['tol']
+            last = k == cases[case]['max_sweeps'] - 1
+
+            # Roll back to the last good state and damp the sweeps if they are diverging
+            max_restarts = cases[case].get('max_restarts', 4)
+            if max_restarts > 0:
+                error = max(S_residual_err, W_residual_err)
+                if check_divergence(error, best_err[case]):
+                    S[index] = S_good[index]
+                    W[index] = W_good[index]
+                    if restarts[case] == max_restarts or last:
+                        finished[index] = True
+                        continue
+
+                    restarts[case] += 1
+                    relax_S[case], relax_W[case] = damp_relaxation(relax_S[case, 0, 0], relax_W[case, 0, 0])
+                    best_err[case] = np.inf
+                    continue
+
+                best_err[case] = min(best_err[case], error)
+                if k + 1 - good_k[case] >= cases[case].get('guard_every', 50) and error <= 2*best_err[case]:
+                    S_good[index] = S[index]
+                    W_good[index] = W[index]
+                    good_k[case] = k + 1
+
+            if S_residual_err <= tol and W_residual_err <= tol or last:
+                finished[index] = True
+
+            # Adjust the relaxation factors
+            elif cases[case].get('auto_relax', False):
+                relax_S[case], relax_W[case] = tune_relaxation(relax_S[case, 0, 0], relax_W[case, 0, 0],
+                                                               S_err[case], W_err[case], R[case, 0, 0])
+
+        # Take the finished cases out of the stack
+        if finished.any():
+            for index in np.nonzero(finished)[0]:
+                case = active[index]
+                beamfront, beamback, beamtop = beams[case]
+                results[case] = {'S': S[index], 'W': W[index], 'x': x, 'y': y, 'beamfront': beamfront,
+                                 'beamback': beamback, 'beamtop': beamtop, 'S_err': S_err[case], 'W_err': W_err[case]}
+
+            active = active[~finished]
+            if len(active) == 0:
+                break
+
+            S, W = S[~finished], W[~finished]
+            S_history, W_history = S_history[~finished], W_history[~finished]
+            S_good, W_good = S_good[~finished], W_good[~finished]
+            points = get_beam_points(*beams[active].T)
+
+    return results
+
+
+def run_stacked(cases, settings, stack_points=32768):
+    """This function solves a batch of small grids in stacks with run_stack, one stack after another.
+    Each stack holds about stack_points grid points, so it stays in the cache from one sweep to the next.
+    Larger stacks are slower per grid, and grids too large to stack together are solved one at a time.
+
+    Args:
+        cases: List of dictionaries of the arguments for solve that vary between cases, e.g. Rey and start_beam_at.
+        settings: Dictionary of the arguments for solve that are the same for every case, which must include n.
+        stack_points: The number of grid points to hold in each stack.
+
+    Returns:
+        results: List of dictionaries of results, as from run_chain, in the same order as cases.
+
+    """
+    cases = [dict(settings, **case) for case in cases]
+
+    # Number of grids in each stack, the padded grids are (2n+2) by (n+1)
+    n = settings['n']
+    stack_size = max(1, stack_points//((2*n + 2)*(n + 1)))
+
+    results = []
+    for start in range(0, len(cases), stack_size):
+        results += run_stack(cases[start:start + stack_size])
+
+    return results
+
+
+if __name__ == "__main__":
+
+    # Define constants shared by every case
+    settings = {'n': 60, 'val_S': 0.5, 'val_W': -1, 'max_sweeps': 20000, 'tol': 18e-5, 'prop_width': 0.08,
+                'prop_height': 0.14, 'ordering': 'red-black', 'backend': 'numpy', 'auto_relax': True}
+
+    # Define the cases to sweep over
+    cases = [{'Rey': Rey, 'start_beam_at': start_beam_at}
+             for Rey in (100, 500, 1000, 5000, 10000, 15000)
+             for start_beam_at in (0.15, 0.3, 0.5)]
+
+    # Run the batch
+    results = run_batch(cases, settings)
+
+    for case, result in zip(cases, results):
+        print(case, 'Sweeps =', len(result['S_err']))
@@ -0,0 +1,329 @@
+"""This is the python module for benchmarking the solver on a fixed matrix of grid sizes and Reynolds numbers.
+It times the update rules, the boundary conditions and full solves, saves the results to a JSON file, and compares
+them against a saved baseline so that a slowdown fails the run.
+Every solver variant is timed on the same cases, so the variants can be compared with each other and over time.
+"""
+
+#Please note the module folders must be in the same folder as this Benchmark file for the imports to run, or installed,
+#as for the Results file.
+
+
+from Init_module.Initialising_functions import initialise
+from Upd_module.Updating_functions import get_beam, apply_update_rules, apply_boundary_conditions
+from Results_File import solve
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import argparse
+import platform
+import json
+import time
+import sys
+import os
+import numpy as np
+
+try:
+    import resource
+    resource_available = True
+except ImportError:
+    resource_available = False
+
+
+# The arguments of solve shared by every case, as in the example run of the Results file
+settings = {'val_S': 0.5, 'val_W': -1, 'tol': 18e-5, 'start_beam_at': 0.15, 'prop_width': 0.08, 'prop_height': 0.14}
+
+# The arguments of solve for each solver variant
+variants = {
+    'lexicographic': {'ordering': 'lexicographic'},
+    'red-black': {'ordering': 'red-black'},
+    'numba': {'ordering': 'red-black', 'backend': 'numba'},
+    'auto-relax': {'ordering': 'red-black', 'auto_relax': True},
+    'multigrid': {'ordering': 'red-black', 'stream_solver': 'multigrid'},
+    'newton': {'ordering': 'red-black', 'solver': 'newton'},
+    'coarse': {'ordering': 'red-black', 'coarse_levels': 2},
+    'parallel': {'ordering': 'red-black', 'workers': 4},
+    'obstacles': {'ordering': 'red-black', 'obstacles': [(0.15, 0.08, 0.14)]},
+    'stretched': {'ordering': 'red-black', 'stretch': 3},
+    'mixed': {'ordering': 'red-black', 'precision': 'mixed'},
+    'anderson': {'ordering': 'red-black', 'anderson': 5},
+}
+
+# The grid sizes and Reynolds numbers of the full matrix, and the runs shown in the README
+n_values = (30, 60, 120, 240, 480)
+Rey_values = (100, 1000, 15000)
+readme_cases = ((60, 1000), (60, 15000))
+
+
+def time_call(func, args, repeats):
+    """This function times a function call, taking the fastest of several repeats to reduce the noise.
+
+    Args:
+        func: The function to time.
+        args: Tuple of the arguments of the function.
+        repeats: The number of times to call the function.
+
+    Returns:
+        best: The fastest wall time of the calls in seconds.
+
+    """
+    best = np.inf
+    for repeat in range(repeats):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def peak_memory(children=False):
+    """This function finds the peak memory the process, or its finished child processes, have used so far.
+
+    Args:
+        children: If True, the peak of the largest child process that has finished, e.g. a worker of the 'parallel'
+            variant, is found in place of that of this process.
+
+    Returns:
+        peak: The peak resident memory in bytes, or None where the resource module is not available.
+
+    """
+    if not resource_available:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux gives kilobytes and macOS gives bytes
+    if sys.platform != 'darwin':
+        peak = peak*1024
+
+    return peak
+
+
+def bench_kernels(n, repeats=3):
+    """This function times one call of the update rules and of the boundary conditions on the initialised grids.
+    It is run in a fresh process by run_isolated, so the peak memory is that of the grids and the calls alone.
+
+    Args:
+        n: Number of divisions in the y-direction between 0-1 inclusively.
+        repeats: The number of times to call each function, the fastest is recorded.
+
+    Returns:
+        records: List of two dictionaries of results, for apply_update_rules and apply_boundary_conditions, each with
+            the peak memory used by the grids and the calls of the function.
+
+    """
+    memory_before = peak_memory()
+    S, W, R, x, y, h = initialise(n, 1000, settings['val_S'], settings['val_W'])
+    beamfront, beamback, beamtop = get_beam(settings['start_beam_at'], settings['prop_width'],
+                                            settings['prop_height'], x, y)
+
+    records = []
+    for name, func, args in (('apply_update_rules', apply_update_rules, (S, W, R, n, h)),
+                             ('apply_boundary_conditions', apply_boundary_conditions,
+                              (S, W, h, beamfront, beamback, beamtop))):
+        wall_time = time_call(func, args, repeats)
+        memory_after = peak_memory()
+        records.append({'benchmark': name, 'variant': None, 'n': n, 'Rey': None, 'wall_time': wall_time,
+                        'sweeps': 1, 'converged': None, 'time_per_sweep_point': wall_time/S.size,
+                        'peak_memory': None if memory_before is None else memory_after - memory_before})
+
+    return records
+
+
+def count_coarse_sweeps(n, Rey, case, max_sweeps):
+    """This function finds the sweeps taken on each coarser grid of a solve with coarse_levels, by solving each
+    coarser grid again as solve does, so the work of the coarse grids can be counted.
+
+    Args:
+        n: Number of divisions in the y-direction between 0-1 inclusively, of the finest grid.
+        Rey: The Reynolds number.
+        case: Dictionary of the arguments of solve, including coarse_levels.
+        max_sweeps: The maximum number of iterations.
+
+    Returns:
+        work: List of the number of sweeps times the number of grid points of each coarser grid.
+
+    """
+    work = []
+    for level in range(1, case.get('coarse_levels', 0) + 1):
+        coarse_case = dict(case, coarse_levels=case['coarse_levels'] - level)
+        S, W, x, y, beamfront, beamback, beamtop, S_err = solve(n=n//2**level, Rey=Rey, max_sweeps=max_sweeps,
+                                                                **coarse_case)[:8]
+        work.append(len(S_err)*S.size)
+
+    return work
+
+
+def bench_solve(n, Rey, variant, max_sweeps):
+    """This function times a full solve of one case with one solver variant.
+    It is run in a fresh process by run_isolated, so the peak memory is that of this solve alone. The worker processes
+    of the 'parallel' variant are counted as each using as much memory as the largest of them. With the 'numba'
+    backend, a small solve is run first so the time of compiling the Numba functions is not counted.
+    The sweeps on the coarser grids of the 'coarse' variant are counted by the grid points they update, so the time
+    per sweep per grid point is comparable across the variants.
+
+    Args:
+        n: Number of divisions in the y-direction between 0-1 inclusively.
+        Rey: The Reynolds number.
+        variant: The name of the solver variant in variants.
+        max_sweeps: The maximum number of iterations.
+
+    Returns:
+        record: Dictionary of results, with the wall time, the number of sweeps on the finest grid, the equivalent
+            number of finest grid sweeps including those on coarser grids, whether the solve converged, the time per
+            sweep per grid point and the peak memory used by the solve and its workers beyond that of the warm up.
+
+    """
+    case = dict(settings, **variants[variant])
+    if case.get('backend') == 'numba':
+        solve(n=10, Rey=Rey, max_sweeps=1, **case)
+
+    memory_before = peak_memory()
+    start = time.perf_counter()
+    S, W, x, y, beamfront, beamback, beamtop, S_err, W_err = solve(n=n, Rey=Rey, max_sweeps=max_sweeps, **case)[:9]
+    wall_time = time.perf_counter() - start
+    memory_after = peak_memory()
+    if memory_before is not None and case.get('workers', 1) > 1:
+        memory_after += case['workers']*peak_memory(children=True)
+
+    # Count the work of the coarser grids after the timed solve, as a share of the work of the finest grid
+    sweeps = len(S_err)
+    work = sweeps*S.size + sum(count_coarse_sweeps(n, Rey, case, max_sweeps))
+    converged = bool(S_err[-1] <= case['tol'] and W_err[-1] <= case['tol'])
+    record = {'benchmark': 'solve', 'variant': variant, 'n': n, 'Rey': Rey, 'wall_time': wall_time,
+              'sweeps': sweeps, 'equivalent_sweeps': work/S.size, 'converged': converged,
+              'time_per_sweep_point': wall_time/work,
+              'peak_memory': None if memory_before is None else memory_after - memory_before}
+
+    return record
+
+
+def run_isolated(func, *args):
+    """This function calls a function in a new process, so it does not share memory or compiled code with the others.
+
+    Args:
+        func: The function to call.
+        *args: The arguments of the function.
+
+    Returns:
+        result: The value returned by the function.
+
+    """
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        result = pool.submit(func, *args).result()
+
+    return result
+
+
+def run_benchmarks(cases, variant_names, max_sweeps=6000, repeats=3):
+    """This function runs the kernel benchmarks for each grid size and the solve benchmarks for each case and variant.
+
+    Args:
+        cases: List of (n, Rey) pairs.
+        variant_names: List of the names of the solver variants in variants.
+        max_sweeps: The maximum number of iterations of each solve.
+        repeats: The number of times to call each kernel.
+
+    Returns:
+        records: List of dictionaries of results, from bench_kernels and bench_solve.
+
+    """
+    records = []
+    for n in sorted(set(n for n, Rey in cases)):
+        records += run_isolated(bench_kernels, n, repeats)
+
+    for variant in variant_names:
+        for n, Rey in cases:
+            record = run_isolated(bench_solve, n, Rey, variant, max_sweeps)
+            print('{} n={} Rey={}: {:.3f} s, {} sweeps'.format(variant, n, Rey, record['wall_time'],
+                                                               record['sweeps']))
+            records.append(record)
+
+    return records
+
+
+def compare(records, baseline, tolerance):
+    """This function compares the wall times of the results against a baseline.
+
+    Args:
+        records: List of dictionaries of results, from run_benchmarks.
+        baseline: List of dictionaries of results of an earlier run.
+        tolerance: The fraction the wall time may grow by before it counts as a slowdown.
+
+    Returns:
+        slowdowns: List of descriptions of the results slower than the baseline.
+
+    """
+    def get_key(record):
+        return record['benchmark'], record['variant'], record['n'], record['Rey']
+
+    base_times = {get_key(record): record['wall_time'] for record in baseline}
+
+    slowdowns = []
+    for record in records:
+        base_time = base_times.get(get_key(record))
+        if base_time is None:
+            continue
+
+        ratio = record['wall_time']/base_time
+        if ratio > 1 + tolerance:
+            slowdowns.append('{} {} n={} Rey={}: {:.4g} s against {:.4g} s in the baseline ({:.2f}x)'.format(
+                *get_key(record), record['wall_time'], base_time, ratio))
+
+    return slowdowns
+
+
+def cli(args=None):
+    """This function runs the benchmarks from the command line and saves the results.
+    If a baseline file exists, the results are compared against it, and the program exits with status 1 if any
+    result is slower than the baseline by more than the tolerance.
+
+    Args:
+        args: List of command line arguments, defaults to those the program was run with.
+
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the solver on a fixed matrix of cases.')
+    parser.add_argument('--n', type=int, nargs='+', default=n_values, help='grid sizes of the matrix')
+    parser.add_argument('--Rey', type=float, nargs='+', default=Rey_values, help='Reynolds numbers of the matrix')
+    parser.add_argument('--readme', action='store_true', help='only run the R=1000 and R=15000 runs of the README')
+    parser.add_argument('--variants', nargs='+', choices=sorted(variants), default=['red-black'],
+                        help='solver variants to benchmark')
+    parser.add_argument('--max-sweeps', dest='max_sweeps', type=int, default=6000, help='maximum number of sweeps')
+    parser.add_argument('--repeats', type=int, default=3, help='number of times to call each kernel')
+    parser.add_argument('--output', default='benchmark_results.json', help='JSON file to save the results to')
+    parser.add_argument('--baseline', default='benchmark_baseline.json', help='JSON file of the baseline results')
+    parser.add_argument('--update-baseline', dest='update_baseline', action='store_true',
+                        help='save the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='fraction the wall time may grow by before it fails the run')
+    args = parser.parse_args(args)
+
+    if args.readme:
+        cases = list(readme_cases)
+    else:
+        cases = [(n, Rey) for n in args.n for Rey in args.Rey]
+
+    records = run_benchmarks(cases, args.variants, args.max_sweeps, args.repeats)
+
+    results = {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+               'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'records': records}
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=4)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(results, file, indent=4)
+
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+        slowdowns = compare(records, baseline['records'], args.tolerance)
+        for slowdown in slowdowns:
+            print('Slower than baseline -', slowdown)
+        if slowdowns:
+            sys.exit(1)
+
+
+
+if __name__ == "__main__":
+
+    cli()
@@ -1,10 +1,9 @@
 """This file contains documentation for the initialising functions.
 
 """
-import pydoc
 import numpy as np
 
-def init_grid(n,Rey):
+def init_grid(n,Rey,dtype=float):
 
     """This function initialises the discretised solution grids S and W with padding.
     
@@ -18,6 +17,7 @@ def init_grid(n,Rey):
     Args:
         n: Number of divisions in the y-direction between 0-1 inclusively.
         Rey: The Reynolds number.
+        dtype: The numpy data type of the grids, e.g. np.float32 to halve their memory.
 
     Returns:
         S_zero: Initialised padded stream grid of zeros - a 2D numpy array.
@@ -37,8 +37,8 @@ def init_grid(n,Rey):
 
     # Initialise padded grids
 
-    S_zero = np.zeros((len(x)+2,len(y)+1)) # Stream function grid
-    W_zero = np.zeros((len(x)+2,len(y)+1)) # Vorticity function grid
+    S_zero = np.zeros((len(x)+2,len(y)+1),dtype=dtype) # Stream function grid
+    W_zero = np.zeros((len(x)+2,len(y)+1),dtype=dtype) # Vorticity function grid
 
     return S_zero, W_zero, R, x, y, h
 
@@ -80,7 +80,7 @@ def init_ghost(S_zero,W_zero,val_S,val_W):
 
     return S_ghosted,W_ghosted
 
-def initialise(n,Rey,val_S,val_W):
+def initialise(n,Rey,val_S,val_W,dtype=float):
     """This function calls init_grid and init_ghost to initialise the solution grids and key constants.
     The initialised grids are padded and their ghost points are set to the starting values.
     This function also returns the grid Reynolds number R, the axis arrays x and y, and the grid spacing h.
@@ -90,6 +90,7 @@ def initialise(n,Rey,val_S,val_W):
         Rey: The Reynolds number.
         val_S: The numerical starting value the ghost points in the stream S grid will be set to.
         val_W: The numerical starting value the ghost points in the vorticity W grid will be set to.
+        dtype: The numpy data type of the grids, e.g. np.float32 to halve their memory.
 
     Returns:
         S: Fully initialised stream function grid - a 2D numpy array.
@@ -102,15 +103,78 @@ def initialise(n,Rey,val_S,val_W):
     """
 
     # Create padded grid of zeros and key constants
-    S_zero,W_zero,R,x,y,h = init_grid(n,Rey)
+    S_zero,W_zero,R,x,y,h = init_grid(n,Rey,dtype)
 
     # Set the starting values of the ghost points
     S,W = init_ghost(S_zero,W_zero,val_S,val_W)
 
     return S,W,R,x,y,h
 
-pydoc.writedoc("Initialising_functions")
+def init_from_coarse(S_coarse,W_coarse,x_coarse,y_coarse,x,y):
+    """This function initialises the solution grids by interpolating solution grids from a coarser grid.
+    The padded points lie one grid spacing beyond the ends of the axes, so the padded grids cover slightly more than the
+    solution space. The coarse padding covers the fine padding, so every fine point lies inside the coarse grid.
+    The values are linearly interpolated along the x-axis and then along the y-axis.
 
+    Args:
+        S_coarse: Padded stream grid from the coarser grid - a 2D numpy array.
+        W_coarse: Padded vorticity grid from the coarser grid - a 2D numpy array.
+        x_coarse: The array of points along the x-axis of the coarser grid.
+        y_coarse: The array of points along the y-axis of the coarser grid.
+        x: The array of points along the x-axis.
+        y: The array of points along the y-axis.
+
+    Returns:
+        S: Initialised padded stream grid - a 2D numpy array.
+        W: Initialised padded vorticity grid - a 2D numpy array.
+
+    """
+    # Find the positions of the padded points, with one extra point at the Inlet, Outlet and Surface
+    h_coarse = y_coarse[1] - y_coarse[0]
+    h = y[1] - y[0]
+    x_coarse_pad = np.concatenate(([x_coarse[0] - h_coarse],x_coarse,[x_coarse[-1] + h_coarse]))
+    y_coarse_pad = np.append(y_coarse,y_coarse[-1] + h_coarse)
+    x_pad = np.concatenate(([x[0] - h],x,[x[-1] + h]))
+    y_pad = np.append(y,y[-1] + h)
+
+    grids = []
+    for grid_coarse in (S_coarse,W_coarse):
+        along_x = np.array([np.interp(x_pad,x_coarse_pad,column) for column in grid_coarse.T]).T
+        grid = np.array([np.interp(y_pad,y_coarse_pad,row) for row in along_x])
+        grids.append(grid)
 
- 
+    S,W = grids
 
+    return S,W
+
+
+def stretch_axis(start,stop,num_points,centres,stretch,width=0.1):
+    """This function places the points of an axis closer together around the centres, to resolve the flow there.
+    The density of points along the axis is 1 + stretch*exp(-((s - centre)/width)**2) summed over the centres, so the
+    spacing at a centre is about 1 + stretch times smaller than the spacing far from the centres.
+    The points are found by inverting the integral of the density, which keeps the spacing smoothly varying.
+
+    Args:
+        start: The first point of the axis.
+        stop: The last point of the axis.
+        num_points: The number of points along the axis.
+        centres: List of the positions along the axis to cluster the points around.
+        stretch: How strongly the points are clustered, 0 for equal spacing.
+        width: The distance from a centre over which the points are clustered.
+
+    Returns:
+        points: The array of points along the axis, from start to stop.
+
+    """
+    # Integrate the density on a fine grid
+    fine = np.linspace(start,stop,100*num_points)
+    density = np.ones_like(fine)
+    for centre in centres:
+        density += stretch*np.exp(-((fine - centre)/width)**2)
+    integral = np.concatenate(([0],np.cumsum((density[1:] + density[:-1])/2*np.diff(fine))))
+
+    # Place the points at equal steps of the integral
+    points = np.interp(np.linspace(0,integral[-1],num_points),integral,fine)
+    points[0],points[-1] = start,stop
+
+    return points
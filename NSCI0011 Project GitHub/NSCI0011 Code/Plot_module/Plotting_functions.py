@@ -1,10 +1,11 @@
 """This file contains documentation for the plotting functions.
 
+Matplotlib is only imported when a plot is made, so the solution can be shaped without it.
+The solution is reflected in the centreline once with mirror_sol, so each function is contoured over the full solution
+space in a single call.
+
 """
-import pydoc
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.patches import Rectangle
 
 def shape_sol(S,W):
     """This function transposes and flips the solution grids and then removes the padding.
@@ -28,10 +29,29 @@ def shape_sol(S,W):
 
     return S_sol, W_sol
 
-def plot_flow(x,y,S_sol,W_sol,beamfront,beamback,beamtop):
+def mirror_sol(y,*grids):
+    """This function reflects grids of the upper half of the solution space in the centreline, to cover the full
+    solution space. The centreline is the first row of each grid, and is not repeated.
+
+    Args:
+        y: The array of points along the y-axis, starting at the centreline.
+        grids: The grids to reflect, indexed (y,x) with the centreline in the first row, as plotted by plot_flow.
+
+    Returns:
+        y_full: The array of points along the y-axis of the full solution space.
+        grids_full: The reflected grids, one for each grid given.
+    """
+
+    y_full = np.concatenate((-y[:0:-1], y))
+    grids_full = [np.concatenate((grid[:0:-1], grid)) for grid in grids]
+
+    return (y_full, *grids_full)
+
+def plot_flow(x,y,S_sol,W_sol,beamfront,beamback,beamtop,file_path=None,solid_sol=None,decimate=1):
     """This function creates contour plots of the stream and vorticity functions.
-    The contours are reflected in the centreline and added to the plot to visualise the full flow profile.
-    The function superimposes a patch with the beam's dimensions onto the beam region in the contour plots.
+    The grids are reflected in the centreline to visualise the full flow profile.
+    The function superimposes a patch with the beam's dimensions onto the beam region in the contour plots, or fills
+    the solid points of the obstacles when solid_sol is given.
 
     Args:
         x: The array of points along the x-axis.
@@ -41,16 +61,27 @@ def plot_flow(x,y,S_sol,W_sol,beamfront,beamback,beamtop):
         beamfront: The integer index along the x-axis where the beamfront DE is located.
         beamback: The integer index along the x-axis there the beamback FG is located.
         beamtop: The integer index along the y-axis where the beamtop EF is located.
+        file_path: The path of an image file to save the plots to, a list of paths to save them in several formats,
+            or None to show them.
+        solid_sol: The solid mask of the obstacles, correctly indexed and with padding removed as by shape_sol, or
+            None to show the beam.
+        decimate: Only every decimate-th point along each axis is contoured, e.g. to plot very large grids quickly.
 
     Returns:
         Contour plot of stream function for the full solution space.
         Contour plot of vorticity function for the full solution space.
     
     """
+    import matplotlib.pyplot as plt
+    from matplotlib.patches import Rectangle
+
+    # Correct for matplotlib plotting the grid upside down, keeping every decimate-th point
+    S_plot = np.flipud(S_sol)[::decimate, ::decimate]
+    W_plot = np.flipud(W_sol)[::decimate, ::decimate]
+    x_plot = x[::decimate]
 
-    # Correct for matplotlib plotting the grid upside down
-    S_plot = np.flipud(S_sol)
-    W_plot = np.flipud(W_sol)
+    # Reflect the grids in the centreline once for the full solution space
+    y_full, S_full, W_full = mirror_sol(y[::decimate], S_plot, W_plot)
 
     # Create subplots
     fig, axs = plt.subplots(1, 2, figsize=(10, 6))
@@ -67,8 +98,7 @@ def plot_flow(x,y,S_sol,W_sol,beamfront,beamback,beamtop):
 
 
     # Plot stream function contour lines
-    cs1 = axs[0].contour(x, y, S_plot,levels=S_levels,colors='black',linewidths=0.9)
-    cs2 = axs[0].contour(x, -y, S_plot,levels=S_levels,colors='black',linewidths=0.9)
+    cs1 = axs[0].contour(x_plot, y_full, S_full,levels=S_levels,colors='black',linewidths=0.9)
     fig.colorbar(cs1, ax=axs[0], label='Stream Function')
     axs[0].set_title('Stream Function Contours')
     axs[0].set_xlabel('X')
@@ -79,11 +109,11 @@ def plot_flow(x,y,S_sol,W_sol,beamfront,beamback,beamtop):
                      x[beamback] - x[beamfront], # width of beam
                      2*y[beamtop], # height of beam - doubled for full solution space
                      alpha=1,facecolor='grey',edgecolor='black',zorder=2)
-    axs[0].add_patch(rect_S)
+    if solid_sol is None:
+        axs[0].add_patch(rect_S)
 
     # Plot vorticity contour lines
-    cs3 = axs[1].contour(x, y, W_plot, levels=W_levels,colors='blue',linewidths=0.6,linestyles='solid')
-    cs4 = axs[1].contour(x, -y, W_plot, levels=W_levels,colors='blue',linewidths=0.6,linestyles='solid')
+    cs3 = axs[1].contour(x_plot, y_full, W_full, levels=W_levels,colors='blue',linewidths=0.6,linestyles='solid')
     fig.colorbar(cs3, ax=axs[1], label='Vorticity')
     axs[1].set_title('Vorticity Contours')
     axs[1].set_xlabel('X')
@@ -95,27 +125,46 @@ def plot_flow(x,y,S_sol,W_sol,beamfront,beamback,beamtop):
                      2*y[beamtop], # height of beam - doubled for full solution space
                      alpha=1,facecolor='grey',edgecolor='black',zorder=2)
     axs[1].grid(False)
-    axs[1].add_patch(rect_W)
-
-    plt.show()
+    if solid_sol is None:
+        axs[1].add_patch(rect_W)
+
+    # Fill the solid points of the obstacles in both plots, reflected in the centreline
+    else:
+        solid_full = mirror_sol(y[::decimate], np.flipud(solid_sol)[::decimate, ::decimate].astype(float))[1]
+        for ax in axs:
+            ax.contourf(x_plot, y_full, solid_full, levels=[0.5,1.5], colors='grey', zorder=2)
+
+    # Save the plots to each file, or show them
+    if file_path is not None:
+        for path in (file_path if isinstance(file_path, (list, tuple)) else [file_path]):
+            fig.savefig(path)
+        plt.close(fig)
+    else:
+        plt.show()
 
     return
 
-def plot_errors(S_err,W_err):
+def plot_errors(S_err,W_err,file_path=None):
     """This function plots the residual errors for the stream and vorticity functions.
     The residual error is the absolute difference in the solution grids between consecutive iterations.
     
     Args:
-        S_err: Numpy array of the residuals for each iteration of the stream function grid.
-        W_err: Numpy array of the residuals for each iteration of the vorticity function grid.
+        S_err: Numpy array of the residuals for each iteration of the stream function grid, nan if not checked.
+        W_err: Numpy array of the residuals for each iteration of the vorticity function grid, nan if not checked.
+        file_path: The path of an image file to save the plots to, a list of paths to save them in several formats,
+            or None to show them.
 
     Returns:
         Plot of relative errors in the stream function against iterations.
         Plot of relative errors in the vorticity function against iterations.
     
     """
-    # Find number of Gauss-Seidel iterations to plot against
+    import matplotlib.pyplot as plt
+
+    # Find number of Gauss-Seidel iterations to plot against, leaving out iterations that were not checked
     iters = np.arange(1, len(S_err)+1,1)
+    checked = ~np.isnan(S_err)
+    iters, S_err, W_err = iters[checked], np.asarray(S_err)[checked], np.asarray(W_err)[checked]
 
     # Create subplots
     fig, axs = plt.subplots(1, 2, figsize=(10, 6))
@@ -135,11 +184,12 @@ def plot_errors(S_err,W_err):
     axs[1].legend()
     axs[1].grid(True)
 
-    plt.show()
+    # Save the plots to each file, or show them
+    if file_path is not None:
+        for path in (file_path if isinstance(file_path, (list, tuple)) else [file_path]):
+            fig.savefig(path)
+        plt.close(fig)
+    else:
+        plt.show()
 
     return
-
-    
-
-pydoc.writedoc("Plotting_functions")
-
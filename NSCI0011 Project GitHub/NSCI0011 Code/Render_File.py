@@ -0,0 +1,193 @@
+"""This is the python module for rendering the plots of saved results to image files, e.g. for a whole sweep over
+Reynolds numbers. Each result is read from an .npz file, saved by the Results file with --output or held in the cache,
+and its flow plots are rendered to PNG or SVG files without a display.
+The results are rendered in parallel on worker processes, each using Matplotlib's non-interactive Agg backend, and
+very large grids can be decimated so they are contoured quickly.
+"""
+
+#Please note the module folders must be in the same folder as this Render file for the imports to run, or installed,
+#as for the Results file.
+
+
+from Plot_module.Plotting_functions import shape_sol, plot_flow, plot_errors
+from Upd_module.Obstacle_functions import get_mask
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import glob
+import json
+import os
+import numpy as np
+
+
+def read_solution(file_path):
+    """This function reads a saved result, and shapes its grids for plotting if they are still padded.
+    A result in the cache holds the padded solid mask of any obstacles. A result cached without it is given the mask
+    rebuilt from the rectangles in the arguments saved with it, so the obstacles are drawn in place of the beam.
+
+    Args:
+        file_path: The path of an .npz file saved by main, or of a result in the cache.
+
+    Returns:
+        solution: Dictionary of the shaped solution grids 'S_sol' and 'W_sol', the axes 'x' and 'y', the beam indices
+            'beamfront', 'beamback' and 'beamtop', the solid mask 'solid_sol' of any obstacles or None, and the errors
+            'S_err' and 'W_err' or None if they were not saved.
+
+    """
+    with np.load(file_path) as data:
+        arrays = {name: data[name] for name in data.files}
+
+    if 'S_sol' not in arrays:
+        arrays['S_sol'], arrays['W_sol'] = shape_sol(arrays['S'], arrays['W'])
+
+        if 'solid' not in arrays:
+            obstacles = read_obstacles(file_path)
+            if isinstance(obstacles, list):
+                arrays['solid'] = get_mask(arrays['S'].shape, arrays['x'], arrays['y'], obstacles)
+            elif obstacles is not None:
+                raise ValueError("The solid mask of " + file_path + " was not cached, so it cannot be rendered")
+        if 'solid' in arrays:
+            arrays['solid_sol'] = shape_sol(arrays['solid'], arrays['solid'])[0]
+
+    solution = {name: arrays.get(name) for name in ('S_sol', 'W_sol', 'x', 'y', 'solid_sol', 'S_err', 'W_err')}
+    for name in ('beamfront', 'beamback', 'beamtop'):
+        solution[name] = int(arrays[name])
+
+    return solution
+
+
+def read_obstacles(file_path):
+    """This function reads the obstacles of a result in the cache from the arguments saved beside it.
+
+    Args:
+        file_path: The path of the .npz file of the result in the cache.
+
+    Returns:
+        obstacles: None for the beam, a list of the rectangles, or a string naming a solid mask, as from
+            describe_obstacles. None if there are no saved arguments.
+
+    """
+    info_path = file_path[:-len('.npz')] + '.json'
+    if not os.path.exists(info_path):
+        return None
+
+    with open(info_path) as file:
+        saved = json.load(file)
+
+    return saved['parameters'].get('obstacles')
+
+
+def use_agg():
+    """This function sets Matplotlib's non-interactive Agg backend in each worker process, so no display is needed."""
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def render_result(file_path, folder, formats=('png',), decimate=1, errors=False):
+    """This function renders the flow plots of one saved result, and optionally its errors, to image files.
+
+    Args:
+        file_path: The path of the .npz file of the result.
+        folder: The path of the folder to save the images to, named after the result file.
+        formats: The image formats to save, e.g. ('png', 'svg').
+        decimate: Only every decimate-th point along each axis is contoured.
+        errors: If True, the errors are also plotted, to files ending in _errors.
+
+    Returns:
+        paths: List of the paths of the images saved.
+
+    """
+    solution = read_solution(file_path)
+    name = os.path.splitext(os.path.basename(file_path))[0]
+
+    paths = [os.path.join(folder, name + '.' + extension) for extension in formats]
+    plot_flow(solution['x'], solution['y'], solution['S_sol'], solution['W_sol'], solution['beamfront'],
+              solution['beamback'], solution['beamtop'], paths, solution['solid_sol'], decimate)
+
+    if errors and solution['S_err'] is not None:
+        error_paths = [os.path.join(folder, name + '_errors.' + extension) for extension in formats]
+        plot_errors(solution['S_err'], solution['W_err'], error_paths)
+        paths += error_paths
+
+    return paths
+
+
+def find_results(paths):
+    """This function finds the result files to render, searching any folders given for .npz files.
+    Files being written to the cache, with names ending in .tmp.npz, are left out.
+
+    Args:
+        paths: List of the paths of result files and of folders holding them.
+
+    Returns:
+        file_paths: List of the paths of the result files, with those in each folder sorted by name.
+
+    """
+    file_paths = []
+    for path in paths:
+        if os.path.isdir(path):
+            file_paths += sorted(file_path for file_path in glob.glob(os.path.join(path, '*.npz'))
+                                 if not file_path.endswith('.tmp.npz'))
+        else:
+            file_paths.append(path)
+
+    return file_paths
+
+
+def render_batch(file_paths, folder, formats=('png',), decimate=1, errors=False, workers=None):
+    """This function renders the plots of many saved results in parallel, with one result at a time on each worker
+    process.
+
+    Args:
+        file_paths: List of the paths of the .npz files of the results.
+        folder: The path of the folder to save the images to, which is created if it does not exist.
+        formats: The image formats to save, e.g. ('png', 'svg').
+        decimate: Only every decimate-th point along each axis is contoured.
+        errors: If True, the errors are also plotted.
+        workers: The number of worker processes, defaults to the number of cores.
+
+    Returns:
+        paths: List of the paths of the images saved for each result, in the same order as file_paths.
+
+    """
+    os.makedirs(folder, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=use_agg) as pool:
+        futures = [pool.submit(render_result, file_path, folder, formats, decimate, errors)
+                   for file_path in file_paths]
+        paths = [future.result() for future in futures]
+
+    return paths
+
+
+def cli(args=None):
+    """This function renders the plots of saved results from the command line.
+
+    Args:
+        args: List of command line arguments, defaults to those the program was run with.
+
+    """
+    parser = argparse.ArgumentParser(description='Render the plots of saved results to image files.')
+    parser.add_argument('paths', nargs='+', help='.npz result files, or folders of them such as the cache')
+    parser.add_argument('--output', default='figures', help='folder to save the images to')
+    parser.add_argument('--formats', nargs='+', choices=('png', 'svg', 'pdf'), default=['png'],
+                        help='image formats to save')
+    parser.add_argument('--decimate', type=int, default=1,
+                        help='only contour every n-th point along each axis, for very large grids')
+    parser.add_argument('--errors', action='store_true', help='also plot the errors of each result')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of worker processes, defaults to the number of cores')
+    args = parser.parse_args(args)
+
+    if args.decimate < 1:
+        parser.error('--decimate must be at least 1')
+
+    file_paths = find_results(args.paths)
+    paths = render_batch(file_paths, args.output, tuple(args.formats), args.decimate, args.errors, args.workers)
+
+    print('Rendered', sum(len(result_paths) for result_paths in paths), 'images from', len(file_paths), 'results')
+
+
+
+if __name__ == "__main__":
+
+    cli()
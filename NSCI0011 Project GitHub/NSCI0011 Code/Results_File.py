@@ -1,22 +1,38 @@
 """This is the main python module where we call all the functions to initialise,
 iteratively update, and then plot the stream S and vorticity W grids.
+The solver can also be run from the command line with cli, which saves the solution and plots to files.
 """
 
-#Please note the function files must be in the same folder as this Results file for the imports to run.
-#They will need to be taken out of the module folders e.g. Upd_module and put into one folder.
+#Please note the module folders e.g. Upd_module must be in the same folder as this Results file for the imports to run,
+#or installed with 'pip install .' from this folder, which also installs the 'nsci0011-solve' command.
 
-#Alternatively, you can try ' from Upd_module.Updating_functions import...' to retrieve from folders.
-#But this may depend on how the files are organised.
+#Numba, SciPy and Matplotlib are only imported when the options that need them are used, so short compute-only runs
+#do not pay their import time.
 
 
-from Initialising_functions import initialise
-from Updating_functions import get_beam, apply_update_rules, apply_boundary_conditions
-from Plotting_functions import shape_sol, plot_flow, plot_errors
+from Init_module.Initialising_functions import initialise, init_from_coarse, stretch_axis
+from Upd_module.Updating_functions import get_beam, apply_sweep, tune_relaxation, relative_change, check_divergence, \
+    damp_relaxation
+from Upd_module.Checkpoint_functions import has_checkpoint, create_checkpoint, open_checkpoint, write_checkpoint, \
+    read_checkpoint, read_anderson, read_guard
+from Upd_module.Cache_functions import load_result, find_nearest, save_result
+from Upd_module.Obstacle_functions import get_mask, describe_obstacles, get_tables, apply_sweep_masked
+from Upd_module.Stretched_functions import get_spacing, apply_sweep_stretched, get_beam_stretched
+from Upd_module.Anderson_functions import create_anderson, reset_anderson, anderson_step
+from Upd_module.Telemetry_functions import open_telemetry, write_record, add_time, apply_sweep_timed, record_sweep, \
+    close_telemetry
+from Plot_module.Plotting_functions import shape_sol, plot_flow, plot_errors
 import numpy as np
-import pydoc
+import argparse
+import time
+import os
 
-def main(n, Rey, val_S,val_W, max_sweeps,tol, start_beam_at, prop_width, prop_height):
-    """This is the main function to execute the full process and call the other functions.
+def solve(n, Rey, val_S,val_W, max_sweeps,tol, start_beam_at, prop_width, prop_height, ordering='lexicographic',
+          backend='numpy', relax_S=1, relax_W=1, auto_relax=False, stream_solver='gauss-seidel', solver='sweeps',
+          newton_switch=1e-2, coarse_levels=0, initial=None, check_every=1, checkpoint=None, checkpoint_every=500,
+          resume=False, telemetry=None, callback=None, max_restarts=4, guard_every=50, workers=1, obstacles=None,
+          stretch=0, precision='double', precision_switch=1e-5, anderson=0):
+    """This function initialises the stream S and vorticity W grids and iterates them to convergence.
     
     Args:
         n: Number of divisions in the y-direction between 0-1 inclusively.
@@ -28,82 +44,615 @@ def main(n, Rey, val_S,val_W, max_sweeps,tol, start_beam_at, prop_width, prop_he
         start_beam_at: The proportion along the x-axis where the beamfront DE is located - a float between 0-1.
         prop_width: Width of the beam as a proportion of the x-axis - a float between 0-1.
         prop_height: Height of the beam as a proportion of the y-axis - a float between 0-1.
-        
-    Results:
-        Contour plot of stream function for the full solution space.
-        Contour plot of vorticity function for the full solution space.
-        Plot of relative errors in the stream function against iterations.
-        Plot of relative errors in the vorticity function against iterations.
+        ordering: The order grid points are updated in each sweep - 'lexicographic' loops point by point,
+            'red-black' updates each colour of a checkerboard at once with NumPy slicing. The two converge to different
+            solutions near the beam, as the 'lexicographic' sweep uses the interim values of the beam faces, see
+            apply_sweep. 'red-black' solves the discrete equations with the beam conditions.
+        backend: 'numpy' for the NumPy sweeps, or 'numba' for the compiled sweeps. With 'numba', 'red-black' ordering
+            runs in parallel on all available cores. Falls back to 'numpy' if Numba is not installed.
+        relax_S: The relaxation factor for the stream function update, 1 for plain Gauss-Seidel, above 1 for SOR.
+        relax_W: The relaxation factor for the vorticity update, below 1 to under-relax at high Reynolds numbers.
+        auto_relax: If True, relax_S and relax_W are starting values that are tuned from the residual errors as the
+            iteration runs.
+        stream_solver: 'gauss-seidel' relaxes S once per sweep alongside W. 'multigrid' updates S by a full multigrid
+            cycle on -(Laplacian of S) = W on the first sweep and a V-cycle on each later sweep, before the sweep
+            updates W only, so relax_S is not used or tuned. Requires SciPy.
+        solver: 'sweeps' iterates the sweeps to convergence. 'newton' sweeps until both relative errors are at most
+            newton_switch and then takes Newton steps on the discrete equations, which converge quadratically.
+            The Newton steps solve the discrete equations of the 'red-black' sweeps whatever the ordering, so with
+            'lexicographic' ordering they converge to the 'red-black' solution. Requires SciPy.
+        newton_switch: The relative error at which the 'newton' solver stops sweeping and starts taking Newton steps.
+        coarse_levels: The number of coarser grids to solve on first, each with half as many divisions as the next.
+            The solution on each grid is interpolated onto the next finer grid as its starting grids.
+        check_every: The number of sweeps between checks of the relative errors. The errors are only found on the
+            sweeps that are checked, which skips the snapshots and norms on the others. Must be 1 with auto_relax.
+        initial: Padded starting grids (S, W) with the same n, e.g. the solution at a nearby Reynolds number.
+            These are used in place of the initialised grids and of coarse_levels. With auto_relax, also pass the
+            relaxation factors tuned for that solution, as the sweeps can diverge from a converged start with factors
+            of 1 before the tuning has had time to back them off.
+        checkpoint: The path of a folder to save checkpoints of the run to, or None for no checkpoints.
+        checkpoint_every: The number of sweeps between checkpoints.
+        resume: If True and the checkpoint folder holds a checkpoint, the run continues from the last checkpoint with
+            the same results as if it had not stopped. The other arguments must match those of the saved run.
+        telemetry: The path of a JSON Lines file, or 'tcp://host:port' for a local socket, to stream a record of each
+            checked sweep to while the run is in progress, or None for no telemetry. Each record holds the errors,
+            the relaxation factors, the sweeps per second and the time spent in each phase of the sweeps since the
+            last record. The solves on the coarse_levels grids are not recorded.
+        callback: A function called with each telemetry record, or None.
+        max_restarts: The number of times the sweeps may diverge and be restarted. When the relative errors stop being
+            finite or grow by a factor of 100, the grids are rolled back to the last good state, the under-relaxation
+            is strengthened with damp_relaxation, and the sweeps continue. After max_restarts restarts, the run stops
+            at its next divergence and returns the last good grids. 0 turns off the check.
+        guard_every: The least number of sweeps between saves of the last good state.
+        workers: The number of worker processes to split the sweeps across, each updating a strip of the grids held
+            in shared memory with solve_parallel. Above 1, needs 'red-black' ordering with the 'numpy' backend, the
+            'gauss-seidel' stream solver and the 'sweeps' solver, without checkpoints or telemetry.
+        obstacles: List of rectangles on the centreline, each (start_at, prop_width, prop_height) as for the beam, or a
+            boolean array of the shape of the padded grids that is True at the solid points, to solve for the flow
+            around in place of the beam, or None for the beam. Only the fluid points are updated, with the walls
+            found by get_tables. Needs the 'numpy' backend, the 'gauss-seidel' stream solver, the 'sweeps' solver
+            and one worker, and an array cannot be used with coarse_levels.
+        stretch: How strongly the grid points are clustered near the beam faces and the centreline, 0 for equal
+            spacing. The spacing there is about 1 + stretch times smaller than far away, with the same number of
+            points, and the grids are updated with the stretched grid functions. Needs the 'numpy' backend, the
+            'gauss-seidel' stream solver, the 'sweeps' solver, one worker, no obstacles and no coarse_levels.
+        precision: 'double' sweeps the float64 grids throughout. 'mixed' sweeps float32 grids, which halves their
+            memory and the memory traffic of each sweep, until both relative errors are at most precision_switch,
+            and then switches to float64 grids for the final sweeps, so the run stops on the errors of float64
+            sweeps. Needs the 'numpy' backend, the 'gauss-seidel' stream solver, the 'sweeps' solver and one worker.
+        precision_switch: The relative error at which the 'mixed' precision switches to float64, or tol if larger.
+        anderson: The number of past sweeps to extrapolate the next grids from with Anderson acceleration, 0 for
+            none. The window is cleared if the residual grows, when the relaxation factors change and after a
+            restart, and is saved with each checkpoint, so a resumed run still has the same results. The sweeps are
+            checked as usual, so the run stops on the change made by a plain sweep. Needs check_every of 1 and one
+            worker.
+
+    Returns:
+        S: The converged stream grid, with padding - a 2D numpy array.
+        W: The converged vorticity grid, with padding - a 2D numpy array.
+        x: The array of points along the x-axis.
+        y: The array of points along the y-axis.
+        beamfront: The integer index along the x-axis where the beamfront DE is located.
+        beamback: The integer index along the x-axis there the beamback FG is located.
+        beamtop: The integer index along the y-axis where the beamtop EF is located.
+        S_err: Numpy array of the relative errors for each iteration of the stream function grid, nan if not checked.
+        W_err: Numpy array of the relative errors for each iteration of the vorticity function grid, nan if not checked.
+        relax_S: The relaxation factor for the stream function update at the end, as tuned if auto_relax is True.
+        relax_W: The relaxation factor for the vorticity update at the end, as tuned if auto_relax is True.
 
     """
     
     # Initialise grid, ghost points, and constants
-    S,W,R,x,y,h = initialise(n, Rey, val_S,val_W)
+    if precision not in ('double', 'mixed'):
+        raise ValueError("precision must be 'double' or 'mixed'")
+    if precision == 'mixed' and (backend != 'numpy' or stream_solver != 'gauss-seidel' or solver != 'sweeps'
+                                 or workers > 1):
+        raise ValueError("'mixed' precision needs the 'numpy' backend, the 'gauss-seidel' stream solver, the "
+                         "'sweeps' solver and one worker")
+    S,W,R,x,y,h = initialise(n, Rey, val_S,val_W, np.float32 if precision == 'mixed' else float)
+
+    # Initialise the error arrays, sweeps that are not checked are left as nan
+    if auto_relax and check_every != 1:
+        raise ValueError("auto_relax needs the errors of every sweep, so check_every must be 1")
+    S_err = np.full(max_sweeps, np.nan)
+    W_err = np.full(max_sweeps, np.nan)
+
+    start = 0
+    newton_started = False
+
+    parameters = {'n': n, 'Rey': Rey, 'val_S': val_S, 'val_W': val_W, 'max_sweeps': max_sweeps, 'tol': tol,
+                  'start_beam_at': start_beam_at, 'prop_width': prop_width, 'prop_height': prop_height,
+                  'ordering': ordering, 'backend': backend, 'relax_S': relax_S, 'relax_W': relax_W,
+                  'auto_relax': auto_relax, 'stream_solver': stream_solver, 'solver': solver,
+                  'newton_switch': newton_switch, 'coarse_levels': coarse_levels, 'check_every': check_every,
+                  'max_restarts': max_restarts, 'guard_every': guard_every,
+                  'obstacles': describe_obstacles(obstacles), 'stretch': stretch, 'precision': precision,
+                  'precision_switch': precision_switch, 'anderson': anderson}
+    resuming = checkpoint is not None and resume and has_checkpoint(checkpoint)
+
+    # Continue from the last checkpoint, or start from the given grids,
+    # or start from the solution on a grid with half as many divisions
+    if resuming:
+        store = open_checkpoint(checkpoint, parameters)
+        S, W, S_err_saved, W_err_saved, start, relax_S, relax_W, newton_started = read_checkpoint(store)
+        S_err[:start] = S_err_saved
+        W_err[:start] = W_err_saved
+
+    elif initial is not None:
+        S, W = initial[0].copy(), initial[1].copy()
+
+    elif coarse_levels > 0:
+        S_coarse, W_coarse, x_coarse, y_coarse = solve(n//2, Rey, val_S, val_W, max_sweeps, tol, start_beam_at,
+                                                       prop_width, prop_height, ordering, backend, relax_S, relax_W,
+                                                       auto_relax, stream_solver, solver, newton_switch,
+                                                       coarse_levels-1, check_every=check_every,
+                                                       max_restarts=max_restarts, guard_every=guard_every,
+                                                       workers=workers, obstacles=obstacles, precision=precision,
+                                                       precision_switch=precision_switch, anderson=anderson)[:4]
+        S, W = init_from_coarse(S_coarse, W_coarse, x_coarse, y_coarse, x, y)
+
+    # Sweep in single precision until the errors reach the switch, a resumed run may have switched already
+    switched = True
+    if precision == 'mixed':
+        switch_at = max(precision_switch, tol)
+        switched = bool(np.any((S_err[:start] <= switch_at) & (W_err[:start] <= switch_at)))
+        if not switched:
+            S, W = S.astype(np.float32), W.astype(np.float32)
+
+        # Python floats keep the float32 sweeps in float32
+        R, h = float(R), float(h)
+
+    # Save checkpoints of a new run
+    if checkpoint is not None and not resuming:
+        store = create_checkpoint(checkpoint, S.shape, max_sweeps, parameters, anderson, max_restarts > 0)
     
 
     # Initialise empty grids to store the solution history
     S_history = np.empty_like(S)
     W_history = np.empty_like(W)
 
-    # Initialise empty error arrays
-    S_err = []
-    W_err = []
-
     # Define beam placement
     beamfront,beamback,beamtop = get_beam(start_beam_at, prop_width, prop_height, x, y)
 
-    # Update grid with Gauss-Seidel iteration
-    for k in range(max_sweeps):
-        
-        # Take snapshots
-        S_history[:] = S[:] # To avoid pointer issues
-        W_history[:] = W[:] # To avoid pointer issues
+    # Cluster the grid points near the beam faces and the centreline, keeping the beam where it is
+    spacing = None
+    if stretch > 0:
+        if backend != 'numpy' or stream_solver != 'gauss-seidel' or solver != 'sweeps' or workers > 1 \
+                or obstacles is not None or coarse_levels > 0:
+            raise ValueError("stretch needs the 'numpy' backend, the 'gauss-seidel' stream solver, the 'sweeps' "
+                             "solver, one worker, no obstacles and no coarse_levels")
+        x_beam, y_beam = (x[beamfront-1], x[beamback-1]), y[beamtop]
+        x = stretch_axis(x[0], x[-1], len(x), x_beam, stretch)
+        y = stretch_axis(y[0], y[-1], len(y), (0, y_beam), stretch)
+        beamfront, beamback, beamtop = get_beam_stretched(x_beam, y_beam, x, y)
+        spacing = get_spacing(x, y)
+
+    # Check the backend is available
+    if backend != 'numpy':
+        from Upd_module.Compiled_functions import select_backend, apply_sweep_compiled
+        backend = select_backend(backend)
+
+    # Build the multigrid hierarchy for the stream function step
+    if stream_solver == 'multigrid':
+        from Upd_module.Multigrid_functions import build_levels, solve_stream
+        levels = build_levels(S.shape, h, beamfront, beamback, beamtop)
+    elif stream_solver != 'gauss-seidel':
+        raise ValueError("stream_solver must be 'gauss-seidel' or 'multigrid'")
 
-        # Update Grids
-        S, W = apply_update_rules(S, W, R, n, h)
-        S, W = apply_boundary_conditions(S, W, h, beamfront, beamback, beamtop)
+    if solver == 'newton':
+        from Upd_module.Newton_functions import newton_step
+    elif solver != 'sweeps':
+        raise ValueError("solver must be 'sweeps' or 'newton'")
 
-        # Find residual errors for plotting
-        S_residual_err = np.linalg.norm(S-S_history)/np.linalg.norm(S)
-        W_residual_err = np.linalg.norm(W-W_history)/np.linalg.norm(W)
-        S_err.append(S_residual_err)
-        W_err.append(W_residual_err)
+    # Find the fluid and wall points around the obstacles, the solid points are not updated
+    tables = None
+    if obstacles is not None:
+        if backend != 'numpy' or stream_solver != 'gauss-seidel' or solver != 'sweeps' or workers > 1:
+            raise ValueError("obstacles need the 'numpy' backend, the 'gauss-seidel' stream solver, the 'sweeps' "
+                             "solver and one worker")
+        tables = get_tables(get_mask(S.shape, x, y, obstacles))
+        S, W = np.ascontiguousarray(S), np.ascontiguousarray(W)
+        S.reshape(-1)[tables['solid']] = 0
 
-        if S_residual_err <= tol and W_residual_err <= tol:
+    # Split the sweeps across worker processes, each updating a strip of the grids
+    if workers > 1:
+        if ordering != 'red-black' or backend != 'numpy' or stream_solver != 'gauss-seidel' or solver != 'sweeps':
+            raise ValueError("workers needs 'red-black' ordering, the 'numpy' backend, the 'gauss-seidel' stream "
+                             "solver and the 'sweeps' solver")
+        if checkpoint is not None or telemetry is not None or callback is not None or anderson > 0:
+            raise ValueError("workers cannot be used with checkpoints, telemetry or anderson")
+
+        from Upd_module.Parallel_functions import solve_parallel
+        S, W, S_err, W_err, k, relax_S, relax_W = solve_parallel(S, W, R, n, h, beamfront, beamback, beamtop,
+                                                                 max_sweeps, tol, workers, relax_S, relax_W,
+                                                                 auto_relax, check_every, max_restarts, guard_every)
+        if S_err[k] <= tol and W_err[k] <= tol:
             print('Number of Sweeps to Convergence =', k)
-            break
-  
-   
-    # Transpose, flip and remove padding
+
+        return S, W, x, y, beamfront, beamback, beamtop, S_err[:k+1], W_err[:k+1], relax_S, relax_W
+
+    # Keep a copy of the last good state to roll back to if the sweeps diverge, a resumed run continues its guard
+    if max_restarts > 0:
+        S_good, W_good = S.copy(), W.copy()
+        good_k = start
+        best_err = np.inf
+        restarts = 0
+        if resuming:
+            guard = read_guard(store)
+            S_good, W_good = guard['S'].astype(S.dtype), guard['W'].astype(W.dtype)
+            good_k, best_err, restarts = guard['k'], guard['best_err'], guard['restarts']
+
+    # Allocate the window of past sweeps to extrapolate from
+    accelerator = None
+    if anderson > 0:
+        if check_every != 1:
+            raise ValueError("anderson needs the change made by every sweep, so check_every must be 1")
+        accelerator = create_anderson(S.shape, anderson)
+        if resuming:
+            read_anderson(store, accelerator)
+
+    # Record the progress of the run, when there is no telemetry the sweeps are not timed
+    sink = None
+    if telemetry is not None or callback is not None:
+        sink = open_telemetry(telemetry, callback, parameters, start)
+
+    # Update grid with Gauss-Seidel iteration, a resumed run that had already used its sweeps does not sweep again
+    k = start - 1
+    try:
+        for k in range(start, max_sweeps):
+
+            # Save the state at the start of the sweep
+            if checkpoint is not None and k > start and k % checkpoint_every == 0:
+                guard = None
+                if max_restarts > 0:
+                    guard = {'S': S_good, 'W': W_good, 'k': good_k, 'best_err': best_err, 'restarts': restarts}
+                write_checkpoint(store, S, W, S_err, W_err, k, relax_S, relax_W, newton_started, accelerator, guard)
+        
+            # Take snapshots before the sweeps that are checked
+            check = (k + 1) % check_every == 0 or k == max_sweeps - 1
+            if check:
+                if sink is not None:
+                    phase_start = time.perf_counter()
+                S_history[:] = S[:] # To avoid pointer issues
+                W_history[:] = W[:] # To avoid pointer issues
+                if sink is not None:
+                    add_time(sink, 'residual', phase_start)
+
+            # Switch to Newton steps once the sweeps are close to the solution
+            if solver == 'newton' and k > 0 and S_err[k-1] <= newton_switch and W_err[k-1] <= newton_switch:
+                newton_started = True
+
+            if sink is not None:
+                phase_start = time.perf_counter()
+
+            if newton_started:
+                S, W = newton_step(S, W, R, n, h, beamfront, beamback, beamtop)
+                if sink is not None:
+                    add_time(sink, 'newton', phase_start)
+
+            else:
+                # Update Grids, with a relaxation factor of 0 the sweep leaves S unchanged
+                sweep_relax_S = relax_S
+                if stream_solver == 'multigrid':
+                    S = solve_stream(S, W, h, beamfront, beamback, beamtop, levels, cycle='fmg' if k == 0 else 'v')
+                    sweep_relax_S = 0
+                    if sink is not None:
+                        add_time(sink, 'stream', phase_start)
+                        phase_start = time.perf_counter()
+
+                if spacing is not None:
+                    S, W = apply_sweep_stretched(S, W, R, spacing, beamfront, beamback, beamtop, ordering, sweep_relax_S,
+                                                 relax_W)
+                    if sink is not None:
+                        add_time(sink, 'update', phase_start)
+                elif tables is not None:
+                    S, W = apply_sweep_masked(S, W, R, n, h, tables, ordering, sweep_relax_S, relax_W)
+                    if sink is not None:
+                        add_time(sink, 'update', phase_start)
+                elif backend == 'numba':
+                    S, W = apply_sweep_compiled(S, W, R, h, beamfront, beamback, beamtop, ordering, sweep_relax_S, relax_W)
+                    if sink is not None:
+                        add_time(sink, 'update', phase_start)
+                elif sink is not None:
+                    S, W = apply_sweep_timed(S, W, R, n, h, beamfront, beamback, beamtop, sink, ordering, sweep_relax_S,
+                                             relax_W)
+                else:
+                    S, W = apply_sweep(S, W, R, n, h, beamfront, beamback, beamtop, ordering, sweep_relax_S, relax_W)
+
+            if not check:
+                continue
+
+            # Find residual errors for plotting
+            if sink is not None:
+                phase_start = time.perf_counter()
+            S_residual_err = relative_change(S, S_history)
+            W_residual_err = relative_change(W, W_history)
+            S_err[k] = S_residual_err
+            W_err[k] = W_residual_err
+            if sink is not None:
+                add_time(sink, 'residual', phase_start)
+                record_sweep(sink, k, S_residual_err, W_residual_err, relax_S, relax_W)
+
+            # Roll back to the last good state and damp the sweeps if they are diverging
+            if max_restarts > 0 and not newton_started:
+                error = max(S_residual_err, W_residual_err)
+                if check_divergence(error, best_err):
+                    S[:] = S_good
+                    W[:] = W_good
+                    if restarts == max_restarts:
+                        print('Diverged at sweep', k, '- stopping after', restarts, 'restarts')
+                        break
+
+                    restarts += 1
+                    relax_S, relax_W = damp_relaxation(relax_S, relax_W)
+                    best_err = np.inf
+                    if accelerator is not None:
+                        reset_anderson(accelerator)
+                    print('Diverged at sweep', k, '- restarting from sweep', good_k, 'with relax_S =', relax_S,
+                          'and relax_W =', relax_W)
+                    if sink is not None:
+                        write_record(sink, {'event': 'restart', 'sweep': k, 'good_sweep': good_k, 'relax_S': relax_S,
+                                            'relax_W': relax_W})
+                    continue
+
+                best_err = min(best_err, error)
+                if k + 1 - good_k >= guard_every and error <= 2*best_err:
+                    S_good[:] = S
+                    W_good[:] = W
+                    good_k = k + 1
+
+            # Switch to double precision for the final sweeps
+            if not switched and S_residual_err <= switch_at and W_residual_err <= switch_at:
+                S, W = S.astype(float), W.astype(float)
+                S_history, W_history = S_history.astype(float), W_history.astype(float)
+                if max_restarts > 0:
+                    S_good, W_good = S_good.astype(float), W_good.astype(float)
+                switched = True
+                if sink is not None:
+                    write_record(sink, {'event': 'precision', 'sweep': k, 'dtype': 'float64'})
+
+            elif switched and S_residual_err <= tol and W_residual_err <= tol:
+                print('Number of Sweeps to Convergence =', k)
+                break
+
+            # Extrapolate the grids for the next sweep from the past sweeps, the snapshots hold the changes of this sweep
+            if accelerator is not None and not newton_started:
+                if sink is not None:
+                    phase_start = time.perf_counter()
+                anderson_step(accelerator, S, W, S_history, W_history)
+                if sink is not None:
+                    add_time(sink, 'anderson', phase_start)
+
+            # Adjust the relaxation factors
+            if auto_relax and not newton_started:
+                relax_factors = (relax_S, relax_W)
+                relax_S, relax_W = tune_relaxation(relax_S, relax_W, S_err[:k+1], W_err[:k+1], R)
+
+                # The multigrid stream solve does not relax S, so its factor is left as given
+                if stream_solver == 'multigrid':
+                    relax_S = relax_factors[0]
+
+                if accelerator is not None and (relax_S, relax_W) != relax_factors:
+                    reset_anderson(accelerator)
+
+    finally:
+        # Record the end of the run and close the telemetry, also when the run is interrupted
+        if sink is not None:
+            close_telemetry(sink, k + 1, bool(k >= 0 and S_err[k] <= tol and W_err[k] <= tol))
+
+    # Return float64 grids from a mixed precision run that did not reach the switch
+    if not switched:
+        S, W = S.astype(float), W.astype(float)
+
+    return S, W, x, y, beamfront, beamback, beamtop, S_err[:k+1], W_err[:k+1], relax_S, relax_W
+
+
+def main(n, Rey, val_S,val_W, max_sweeps,tol, start_beam_at, prop_width, prop_height, ordering='lexicographic',
+         backend='numpy', relax_S=1, relax_W=1, auto_relax=False, stream_solver='gauss-seidel', solver='sweeps',
+         newton_switch=1e-2, coarse_levels=0, check_every=1, checkpoint=None, checkpoint_every=500, resume=False,
+         cache=None, cache_size=10**9, warm_start=False, output=None, plot_folder=None, show_plots=True,
+         telemetry=None, callback=None, max_restarts=4, guard_every=50, workers=1, obstacles=None, stretch=0,
+         precision='double', precision_switch=1e-5, anderson=0):
+    """This is the main function to execute the full process and call the other functions.
+    
+    Args:
+        n: Number of divisions in the y-direction between 0-1 inclusively.
+        Rey: The Reynolds number.
+        val_S: The numerical starting value the ghost points in the stream S grid will be set to.
+        val_W: The numerical starting value the ghost points in the vorticity W grid will be set to.
+        max_sweeps: The maximum number of Gauss-Seidel iterations the function will perform.
+        tol: The tolerance for convergence, if relative error is less than or equal to tol, the iteration loop breaks.
+        start_beam_at: The proportion along the x-axis where the beamfront DE is located - a float between 0-1.
+        prop_width: Width of the beam as a proportion of the x-axis - a float between 0-1.
+        prop_height: Height of the beam as a proportion of the y-axis - a float between 0-1.
+        ordering: The order grid points are updated in each sweep - 'lexicographic' loops point by point,
+            'red-black' updates each colour of a checkerboard at once with NumPy slicing. The two converge to different
+            solutions near the beam, as the 'lexicographic' sweep uses the interim values of the beam faces, see
+            apply_sweep. 'red-black' solves the discrete equations with the beam conditions.
+        backend: 'numpy' for the NumPy sweeps, or 'numba' for the compiled sweeps. With 'numba', 'red-black' ordering
+            runs in parallel on all available cores. Falls back to 'numpy' if Numba is not installed.
+        relax_S: The relaxation factor for the stream function update, 1 for plain Gauss-Seidel, above 1 for SOR.
+        relax_W: The relaxation factor for the vorticity update, below 1 to under-relax at high Reynolds numbers.
+        auto_relax: If True, relax_S and relax_W are starting values that are tuned from the residual errors as the
+            iteration runs.
+        stream_solver: 'gauss-seidel' relaxes S once per sweep alongside W. 'multigrid' updates S by a full multigrid
+            cycle on -(Laplacian of S) = W on the first sweep and a V-cycle on each later sweep, before the sweep
+            updates W only, so relax_S is not used or tuned. Requires SciPy.
+        solver: 'sweeps' iterates the sweeps to convergence. 'newton' sweeps until both relative errors are at most
+            newton_switch and then takes Newton steps on the discrete equations, which converge quadratically.
+            The Newton steps solve the discrete equations of the 'red-black' sweeps whatever the ordering, so with
+            'lexicographic' ordering they converge to the 'red-black' solution. Requires SciPy.
+        newton_switch: The relative error at which the 'newton' solver stops sweeping and starts taking Newton steps.
+        coarse_levels: The number of coarser grids to solve on first, each with half as many divisions as the next.
+            The solution on each grid is interpolated onto the next finer grid as its starting grids.
+        check_every: The number of sweeps between checks of the relative errors. The errors are only found on the
+            sweeps that are checked, which skips the snapshots and norms on the others. Must be 1 with auto_relax.
+        checkpoint: The path of a folder to save checkpoints of the run to, or None for no checkpoints.
+        checkpoint_every: The number of sweeps between checkpoints.
+        resume: If True and the checkpoint folder holds a checkpoint, the run continues from the last checkpoint with
+            the same results as if it had not stopped. The other arguments must match those of the saved run.
+        cache: The path of a folder to keep converged results in, or None for no cache. A run with the same arguments
+            as a cached result is loaded from the cache instead of solved, and a new result is saved to it if its errors
+            are within tol.
+        cache_size: The largest total size of the cache in bytes, the least recently used results are removed first.
+        warm_start: If True and the cache does not hold the result, the run starts from the cached result with the
+            nearest Reynolds number and otherwise the same arguments, along with its final relaxation factors. The
+            result is cached under the Reynolds number it started from, so a run without warm_start never loads it.
+        output: The path of an .npz file to save the solution grids S_sol and W_sol, the axes, the beam indices and
+            the errors to, with the solid mask solid_sol of any obstacles, or None to not save them.
+        plot_folder: The path of a folder to save the plots to as flow.png and errors.png, or None to not save them.
+        show_plots: If True and plot_folder is None, the plots are shown.
+        telemetry: The path of a JSON Lines file, or 'tcp://host:port' for a local socket, to stream the progress of
+            the run to, or None for no telemetry. See solve for the records.
+        callback: A function called with each telemetry record, or None.
+        max_restarts: The number of times the sweeps may diverge and be rolled back with stronger under-relaxation,
+            0 turns off the check. See solve for the details.
+        guard_every: The least number of sweeps between saves of the last good state to roll back to.
+        workers: The number of worker processes to split the sweeps across. See solve for the arguments it needs.
+        obstacles: List of rectangles, or a solid mask, to solve for the flow around in place of the beam, or None for
+            the beam. See solve for the details.
+        stretch: How strongly the grid points are clustered near the beam faces and the centreline, 0 for equal
+            spacing. See solve for the details.
+        precision: 'double' for float64 sweeps throughout, or 'mixed' for float32 sweeps until the relative errors
+            reach precision_switch and float64 sweeps after. See solve for the details.
+        precision_switch: The relative error at which the 'mixed' precision switches to float64, or tol if larger.
+        anderson: The number of past sweeps to extrapolate the next grids from with Anderson acceleration, 0 for
+            none. See solve for the details.
+        
+    Results:
+        Contour plot of stream function for the full solution space.
+        Contour plot of vorticity function for the full solution space.
+        Plot of relative errors in the stream function against iterations.
+        Plot of relative errors in the vorticity function against iterations.
+
+    """
+    
+    # The arguments that affect the result, the backend, workers and checkpoints give the same result
+    parameters = {'n': n, 'Rey': Rey, 'val_S': val_S, 'val_W': val_W, 'max_sweeps': max_sweeps, 'tol': tol,
+                  'start_beam_at': start_beam_at, 'prop_width': prop_width, 'prop_height': prop_height,
+                  'ordering': ordering, 'relax_S': relax_S, 'relax_W': relax_W, 'auto_relax': auto_relax,
+                  'stream_solver': stream_solver, 'solver': solver, 'newton_switch': newton_switch,
+                  'coarse_levels': coarse_levels, 'check_every': check_every, 'max_restarts': max_restarts,
+                  'guard_every': guard_every, 'obstacles': describe_obstacles(obstacles), 'stretch': stretch,
+                  'precision': precision, 'precision_switch': precision_switch, 'anderson': anderson}
+
+    # Load the result from the cache, or find the nearest cached result to start from
+    result = None
+    initial = None
+    relax = {}
+    cache_parameters = parameters
+    if cache is not None:
+        result = load_result(cache, parameters)
+        if result is None and warm_start:
+            nearest = find_nearest(cache, parameters)
+            if nearest is not None:
+                initial = (nearest['S'], nearest['W'])
+                relax = {'relax_S': nearest['relax_S'], 'relax_W': nearest['relax_W']}
+
+                # A warm started result differs from a cold one, so it is cached under the result it started from
+                cache_parameters = dict(parameters, warm_start_Rey=nearest['Rey'])
+                result = load_result(cache, cache_parameters)
+
+    # Solve for the stream and vorticity grids
+    if result is None:
+        names = ('S', 'W', 'x', 'y', 'beamfront', 'beamback', 'beamtop', 'S_err', 'W_err', 'relax_S', 'relax_W')
+        result = dict(zip(names, solve(**dict(parameters, obstacles=obstacles, **relax), backend=backend,
+                                       initial=initial, checkpoint=checkpoint, checkpoint_every=checkpoint_every,
+                                       resume=resume, telemetry=telemetry, callback=callback, workers=workers)))
+        if cache is not None:
+            # Keep the solid mask of any obstacles with the result, so it can be rendered from the cache
+            if obstacles is not None:
+                result['solid'] = get_mask(result['S'].shape, result['x'], result['y'], obstacles)
+            save_result(cache, cache_parameters, result, cache_size)
+
+    S, W, x, y = result['S'], result['W'], result['x'], result['y']
+    beamfront, beamback, beamtop = result['beamfront'], result['beamback'], result['beamtop']
+    S_err, W_err = result['S_err'], result['W_err']
+
+    # Transpose, flip and remove padding, with the solid mask of the obstacles to plot in place of the beam
     S_sol, W_sol = shape_sol(S,W)
+    solid_sol = None
+    if obstacles is not None:
+        solid = get_mask(S.shape, x, y, obstacles)
+        solid_sol = shape_sol(solid, solid)[0]
+
+    # Save the solution
+    if output is not None:
+        obstacle_arrays = {} if solid_sol is None else {'solid_sol': solid_sol}
+        np.savez(output, S_sol=S_sol, W_sol=W_sol, x=x, y=y, beamfront=beamfront, beamback=beamback,
+                 beamtop=beamtop, S_err=S_err, W_err=W_err, **obstacle_arrays)
+
+    # Save or show the plots
+    if plot_folder is not None:
+        os.makedirs(plot_folder, exist_ok=True)
+        flow_path = os.path.join(plot_folder, 'flow.png')
+        errors_path = os.path.join(plot_folder, 'errors.png')
+    elif show_plots:
+        flow_path, errors_path = None, None
+    else:
+        return
     
-    # Plot contours for stream and vorticity functions
-    plot_flow(x, y, S_sol, W_sol, beamfront, beamback, beamtop)
+    # Plot contours for stream and vorticity functions, with the obstacles in place of the beam
+    plot_flow(x, y, S_sol, W_sol, beamfront, beamback, beamtop, flow_path, solid_sol)
 
     # Plot residual errors for stream and vorticity functions
-    plot_errors(S_err, W_err)
+    plot_errors(S_err, W_err, errors_path)
     
 
+def cli(args=None):
+    """This function runs main from the command line, with each argument of main as a flag.
+    The solution is saved to an .npz file, and the plots are only made if --plots or --show is given.
 
-if __name__ == "__main__":
+    Args:
+        args: List of command line arguments, defaults to those the program was run with.
+
+    """
+    parser = argparse.ArgumentParser(description='Solve for the steady flow around a submerged beam.')
 
     # Define constants
-    n = 60
-    Rey = 1000
-    val_S = 0.5
-    val_W = -1
-    max_sweeps = 6000
-    tol = 18e-5
-    start_beam_at = 0.15
-    prop_width = 0.08
-    prop_height = 0.14
-
-   
+    parser.add_argument('--n', type=int, default=60, help='number of divisions in the y-direction')
+    parser.add_argument('--Rey', type=float, default=1000, help='the Reynolds number')
+    parser.add_argument('--val-S', dest='val_S', type=float, default=0.5, help='starting value of the stream grid')
+    parser.add_argument('--val-W', dest='val_W', type=float, default=-1, help='starting value of the vorticity grid')
+    parser.add_argument('--max-sweeps', dest='max_sweeps', type=int, default=6000, help='maximum number of sweeps')
+    parser.add_argument('--tol', type=float, default=18e-5, help='tolerance of the relative errors')
+    parser.add_argument('--start-beam-at', dest='start_beam_at', type=float, default=0.15,
+                        help='proportion along the x-axis of the beamfront')
+    parser.add_argument('--prop-width', dest='prop_width', type=float, default=0.08,
+                        help='width of the beam as a proportion of the x-axis')
+    parser.add_argument('--prop-height', dest='prop_height', type=float, default=0.14,
+                        help='height of the beam as a proportion of the y-axis')
+    parser.add_argument('--ordering', choices=('lexicographic', 'red-black'), default='lexicographic')
+    parser.add_argument('--backend', choices=('numpy', 'numba'), default='numpy')
+    parser.add_argument('--relax-S', dest='relax_S', type=float, default=1, help='stream relaxation factor')
+    parser.add_argument('--relax-W', dest='relax_W', type=float, default=1, help='vorticity relaxation factor')
+    parser.add_argument('--auto-relax', dest='auto_relax', action='store_true', help='tune the relaxation factors')
+    parser.add_argument('--stream-solver', dest='stream_solver', choices=('gauss-seidel', 'multigrid'),
+                        default='gauss-seidel')
+    parser.add_argument('--solver', choices=('sweeps', 'newton'), default='sweeps')
+    parser.add_argument('--newton-switch', dest='newton_switch', type=float, default=1e-2,
+                        help='relative error at which Newton steps start')
+    parser.add_argument('--coarse-levels', dest='coarse_levels', type=int, default=0,
+                        help='number of coarser grids to solve on first')
+    parser.add_argument('--check-every', dest='check_every', type=int, default=1,
+                        help='number of sweeps between checks of the errors')
+    parser.add_argument('--checkpoint', default=None, help='folder to save checkpoints to')
+    parser.add_argument('--checkpoint-every', dest='checkpoint_every', type=int, default=500,
+                        help='number of sweeps between checkpoints')
+    parser.add_argument('--resume', action='store_true', help='continue from the last checkpoint')
+    parser.add_argument('--cache', default=None, help='folder to keep converged results in')
+    parser.add_argument('--cache-size', dest='cache_size', type=int, default=10**9,
+                        help='largest size of the cache in bytes')
+    parser.add_argument('--warm-start', dest='warm_start', action='store_true',
+                        help='start from the cached result with the nearest Reynolds number')
+    parser.add_argument('--output', default='solution.npz', help='.npz file to save the solution to')
+    parser.add_argument('--plots', dest='plot_folder', default=None, help='folder to save the plots to')
+    parser.add_argument('--show', dest='show_plots', action='store_true', help='show the plots')
+    parser.add_argument('--telemetry', default=None,
+                        help="JSON Lines file or 'tcp://host:port' to stream the progress of the run to")
+    parser.add_argument('--max-restarts', dest='max_restarts', type=int, default=4,
+                        help='number of times a diverging run is rolled back and damped, 0 to not check')
+    parser.add_argument('--guard-every', dest='guard_every', type=int, default=50,
+                        help='least number of sweeps between saves of the last good state')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of worker processes to split the red-black sweeps across')
+    parser.add_argument('--obstacle', dest='obstacles', type=float, nargs=3, action='append', default=None,
+                        metavar=('START', 'WIDTH', 'HEIGHT'),
+                        help='rectangle on the centreline to solve around in place of the beam, may be repeated')
+    parser.add_argument('--stretch', type=float, default=0,
+                        help='how strongly to cluster the grid points near the beam and the centreline, 0 for none')
+    parser.add_argument('--precision', choices=('double', 'mixed'), default='double',
+                        help="'mixed' sweeps in float32 and then refines in float64")
+    parser.add_argument('--precision-switch', dest='precision_switch', type=float, default=1e-5,
+                        help="relative error at which 'mixed' precision switches to float64")
+    parser.add_argument('--anderson', type=int, default=0,
+                        help='number of past sweeps to extrapolate from with Anderson acceleration, 0 for none')
 
     # Call main function with arguments
-    main(n, Rey, val_S, val_W, max_sweeps, tol, start_beam_at, prop_width, prop_height)
+    main(**vars(parser.parse_args(args)))
 
-   
 
-#pydoc.writedoc("Results_File")
 
+if __name__ == "__main__":
+
+    cli()
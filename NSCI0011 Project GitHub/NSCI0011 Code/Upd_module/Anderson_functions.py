@@ -0,0 +1,123 @@
+"""This file contains documentation for the Anderson acceleration functions.
+
+These functions speed up the sweeps, which are a fixed-point map from the grids (S,W) before a sweep to the grids
+after it, by Anderson acceleration. The next grids are extrapolated from a small window of the past sweeps, as the
+combination of their results whose residuals, the changes made by each sweep, best cancel out.
+The past sweeps are kept in a ring buffer allocated at the start, with the dot products of their residuals, so each
+sweep adds one entry and only finds the dot products of that entry. The extrapolated grids are an affine combination
+of swept grids, so they still meet the boundary conditions, and the discretisation is unchanged.
+If the residual grows, the window is cleared and the plain sweep is used, so the acceleration cannot stall the sweeps.
+
+"""
+import numpy as np
+
+
+def create_anderson(shape,window,growth=2):
+    """This function allocates the ring buffer of past sweeps for Anderson acceleration.
+
+    Args:
+        shape: The shape of the padded solution grids - a tuple of two integers.
+        window: The number of past sweeps to keep.
+        growth: The factor the residual may grow by since the smallest residual of the window before it is cleared.
+
+    Returns:
+        anderson: Dictionary of the changes between sweeps of the swept grids 'G' and of the residuals 'F', each of
+            shape (window,2,nx,ny), the dot products of the residual changes 'gram', the swept grids 'last_G' and
+            residuals 'last_F' of the last sweep, the number of entries 'count', the next slot 'slot', the smallest
+            residual 'best' of the window, and the 'growth'.
+
+    """
+    anderson = {'G': np.zeros((window,2) + tuple(shape)),
+                'F': np.zeros((window,2) + tuple(shape)),
+                'gram': np.zeros((window,window)),
+                'last_G': np.zeros((2,) + tuple(shape)),
+                'last_F': np.zeros((2,) + tuple(shape)),
+                'count': -1,
+                'slot': 0,
+                'best': np.inf,
+                'growth': growth}
+
+    return anderson
+
+
+def reset_anderson(anderson):
+    """This function clears the window of past sweeps, e.g. after the sweep map has changed.
+
+    Args:
+        anderson: The ring buffer from create_anderson.
+
+    """
+    anderson['count'] = -1
+    anderson['slot'] = 0
+    anderson['best'] = np.inf
+
+
+def anderson_step(anderson,S,W,S_change,W_change):
+    """This function extrapolates the grids for the next sweep from the last sweep and the window of past sweeps.
+    The weights gamma minimise the norm of F_k - dF*gamma, where F_k is the residual of the last sweep and dF the
+    changes in the residual between the past sweeps, and the next grids are G_k - dG*gamma, where G_k are the swept
+    grids and dG the changes in the swept grids.
+
+    Args:
+        anderson: The ring buffer from create_anderson.
+        S: Stream grid after the last sweep - a 2D numpy array, overwritten with the extrapolated grid.
+        W: Vorticity grid after the last sweep - a 2D numpy array, overwritten with the extrapolated grid.
+        S_change: The change in the stream grid made by the last sweep - a 2D numpy array.
+        W_change: The change in the vorticity grid made by the last sweep - a 2D numpy array.
+
+    Returns:
+        accelerated: True if the grids were extrapolated, False if the plain sweep was kept.
+
+    """
+    window = len(anderson['G'])
+    G,F,gram = anderson['G'],anderson['F'],anderson['gram']
+    last_G,last_F = anderson['last_G'],anderson['last_F']
+
+    # Clear the window if the residual has grown, and keep the plain sweep
+    residual = np.sqrt(np.vdot(S_change,S_change) + np.vdot(W_change,W_change))
+    if not np.isfinite(residual) or residual > anderson['growth']*anderson['best']:
+        reset_anderson(anderson)
+    anderson['best'] = min(anderson['best'],residual)
+
+    # Add the changes since the last sweep to the ring buffer, with the dot products of the new residual change
+    if anderson['count'] >= 0:
+        slot = anderson['slot']
+        np.subtract(S,last_G[0],out=G[slot,0])
+        np.subtract(W,last_G[1],out=G[slot,1])
+        np.subtract(S_change,last_F[0],out=F[slot,0])
+        np.subtract(W_change,last_F[1],out=F[slot,1])
+        anderson['count'] = min(anderson['count'] + 1,window)
+        anderson['slot'] = (slot + 1) % window
+
+        count = anderson['count']
+        products = F[:count].reshape(count,-1) @ F[slot].reshape(-1)
+        gram[slot,:count] = products
+        gram[:count,slot] = products
+    else:
+        anderson['count'] = 0
+
+    last_G[0],last_G[1] = S,W
+    last_F[0],last_F[1] = S_change,W_change
+
+    count = anderson['count']
+    if count == 0:
+        return False
+
+    # Solve the small least squares problem, with a little regularisation against nearly parallel residuals
+    A = gram[:count,:count]
+    b = F[:count].reshape(count,-1) @ last_F.reshape(-1)
+    regularisation = 1e-10*np.trace(A)/count
+    try:
+        gamma = np.linalg.solve(A + regularisation*np.eye(count),b)
+    except np.linalg.LinAlgError:
+        reset_anderson(anderson)
+        return False
+    if not np.all(np.isfinite(gamma)):
+        reset_anderson(anderson)
+        return False
+
+    # Extrapolate the grids for the next sweep
+    S -= np.tensordot(gamma,G[:count,0],axes=1)
+    W -= np.tensordot(gamma,G[:count,1],axes=1)
+
+    return True
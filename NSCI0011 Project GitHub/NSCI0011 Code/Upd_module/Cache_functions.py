@@ -0,0 +1,217 @@
+"""This file contains documentation for the cache functions.
+
+These functions keep converged results in a cache folder, so a run with the same arguments can be loaded instead of
+solved again. Each result is saved as an .npz file named by a hash of the arguments that affect it, with the arguments
+in a .json file of the same name. Numbers are hashed as floats, so Rey=1000 from the API and Rey=1000.0 from the
+command line find the same result. Only results whose errors are within tol are saved.
+When the cache grows beyond its size limit, the least recently used results are removed first.
+The cache can also find the result with the nearest Reynolds number and otherwise the same arguments, to use as the
+starting grids for a new run. A run started from another result is saved with the Reynolds number it started from as
+one of its arguments, so it is only loaded for a run started from the same result, and never for a run solved from
+scratch.
+
+"""
+import os
+import json
+import glob
+import hashlib
+import numpy as np
+
+# Increase this when a change to the solver changes its results, so older results are not used
+solver_version = 4
+
+
+def normalise(value):
+    """This function gives the form of an argument that is hashed, with every number as a float, so equal numbers of
+    different types give the same key.
+
+    Args:
+        value: The value of an argument, as saved to JSON.
+
+    Returns:
+        value: The value with its numbers as floats, and its lists and dictionaries normalised in turn.
+
+    """
+    if isinstance(value,bool):
+        return value
+    if isinstance(value,(int,float,np.integer,np.floating)):
+        return float(value)
+    if isinstance(value,(list,tuple)):
+        return [normalise(item) for item in value]
+    if isinstance(value,dict):
+        return {name: normalise(item) for name,item in value.items()}
+
+    return value
+
+
+def get_key(parameters):
+    """This function finds the name of a result in the cache from the arguments of the run.
+
+    Args:
+        parameters: Dictionary of the arguments that affect the result.
+
+    Returns:
+        key: A hexadecimal string that changes with any of the arguments or the solver version.
+
+    """
+    text = json.dumps(normalise({'solver_version': solver_version, **parameters}),sort_keys=True)
+    key = hashlib.sha256(text.encode()).hexdigest()
+
+    return key
+
+
+def read_result(file_path):
+    """This function reads a result from a file in the cache.
+
+    Args:
+        file_path: The path of the .npz file of the result.
+
+    Returns:
+        result: Dictionary of the padded solution grids 'S' and 'W', the axes 'x' and 'y', the beam indices
+            'beamfront', 'beamback' and 'beamtop', the errors 'S_err' and 'W_err', the final relaxation factors
+            'relax_S' and 'relax_W', and for a run with obstacles, their padded solid mask 'solid'.
+
+    """
+    with np.load(file_path) as data:
+        result = {name: data[name] for name in data.files}
+
+    for name in ('beamfront','beamback','beamtop'):
+        result[name] = int(result[name])
+    for name in ('relax_S','relax_W'):
+        result[name] = float(result[name])
+
+    return result
+
+
+def load_result(path,parameters):
+    """This function loads the result of a run with the same arguments from the cache, if there is one.
+
+    Args:
+        path: The path of the cache folder.
+        parameters: Dictionary of the arguments that affect the result.
+
+    Returns:
+        result: Dictionary of the result as from read_result, or None if the cache does not hold it.
+
+    """
+    file_path = os.path.join(path,get_key(parameters) + '.npz')
+    if not os.path.exists(file_path):
+        return None
+
+    result = read_result(file_path)
+
+    # Mark the result as recently used
+    os.utime(file_path)
+
+    return result
+
+
+def find_nearest(path,parameters):
+    """This function loads the result with the nearest Reynolds number and otherwise the same arguments from the cache.
+
+    Args:
+        path: The path of the cache folder.
+        parameters: Dictionary of the arguments that affect the result.
+
+    Returns:
+        result: Dictionary of the result as from read_result, with the Reynolds number 'Rey' it was solved at, or None
+            if the cache does not hold one.
+
+    """
+    family = {name: value for name,value in parameters.items() if name != 'Rey'}
+
+    nearest = None
+    for info_path in glob.glob(os.path.join(path,'*.json')):
+        try:
+            with open(info_path) as file:
+                saved = json.load(file)
+        except (OSError,ValueError):
+            continue
+
+        if saved.get('solver_version') != solver_version:
+            continue
+        saved_family = {name: value for name,value in saved['parameters'].items() if name != 'Rey'}
+        if saved_family != family:
+            continue
+
+        distance = abs(saved['parameters']['Rey'] - parameters['Rey'])
+        if nearest is None or distance < nearest[0]:
+            nearest = (distance,info_path[:-len('.json')] + '.npz',saved['parameters']['Rey'])
+
+    if nearest is None or not os.path.exists(nearest[1]):
+        return None
+
+    result = read_result(nearest[1])
+    result['Rey'] = nearest[2]
+    os.utime(nearest[1])
+
+    return result
+
+
+def save_result(path,parameters,result,cache_size):
+    """This function saves a result to the cache, and then removes the least recently used results until the cache
+    is within its size limit.
+    Only converged results are saved, so a run that used up its sweeps, or diverged and gave up with its last good
+    grids and damped relaxation factors, is never loaded or used as a warm start.
+    Each file is written under a temporary name and then renamed, so other processes never read a partial result.
+
+    Args:
+        path: The path of the cache folder, which is created if it does not exist.
+        parameters: Dictionary of the arguments that affect the result, including the tolerance 'tol'.
+        result: Dictionary of the result, with the entries listed in read_result.
+        cache_size: The largest total size of the cache in bytes.
+
+    Returns:
+        saved: True if the result converged and was saved.
+
+    """
+    if not (result['S_err'][-1] <= parameters['tol'] and result['W_err'][-1] <= parameters['tol']):
+        return False
+
+    os.makedirs(path,exist_ok=True)
+    key = get_key(parameters)
+
+    np.savez(os.path.join(path,key + '.tmp.npz'),**result)
+    with open(os.path.join(path,key + '.tmp.json'),'w') as file:
+        json.dump({'solver_version': solver_version, 'parameters': parameters},file,indent=4)
+
+    os.replace(os.path.join(path,key + '.tmp.json'),os.path.join(path,key + '.json'))
+    os.replace(os.path.join(path,key + '.tmp.npz'),os.path.join(path,key + '.npz'))
+
+    evict(path,cache_size)
+
+    return True
+
+
+def evict(path,cache_size):
+    """This function removes the least recently used results until the cache is within its size limit.
+
+    Args:
+        path: The path of the cache folder.
+        cache_size: The largest total size of the cache in bytes.
+
+    """
+    entries = []
+    for file_path in glob.glob(os.path.join(path,'*.npz')):
+        if file_path.endswith('.tmp.npz'):
+            continue
+        info_path = file_path[:-len('.npz')] + '.json'
+        try:
+            size = os.path.getsize(file_path) + os.path.getsize(info_path)
+            used = os.path.getmtime(file_path)
+        except OSError:
+            continue
+        entries.append((used,size,file_path,info_path))
+
+    # Remove the oldest results first
+    entries.sort()
+    total = sum(entry[1] for entry in entries)
+    for used,size,file_path,info_path in entries:
+        if total <= cache_size:
+            break
+        for remove_path in (file_path,info_path):
+            try:
+                os.remove(remove_path)
+            except OSError:
+                pass
+        total -= size
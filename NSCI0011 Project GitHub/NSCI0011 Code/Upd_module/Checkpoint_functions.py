@@ -0,0 +1,238 @@
+"""This file contains documentation for the checkpoint functions.
+
+These functions save the state of a solve to a checkpoint folder during the iteration, so a long run can be continued
+from its last checkpoint after a crash or timeout.
+The grids, the error arrays and a small state array are each held in a memory-mapped .npy file, so writing a
+checkpoint only copies the grids and the new errors into the files, without saving them again from scratch.
+The grids are written into two alternating slots, and the state array, which is written last, records the slot to
+read. A crash part way through writing a checkpoint therefore leaves the previous checkpoint intact.
+With Anderson acceleration, the window of past sweeps is written into two slots in the same way, so a resumed run
+extrapolates from the same past sweeps as the run it continues. The last good state of the divergence guard and the
+number of restarts are saved too, so a resumed run rolls back to the same state with the same restarts left.
+
+"""
+import os
+import json
+import numpy as np
+
+
+def has_checkpoint(path):
+    """This function checks whether a checkpoint folder holds a checkpoint.
+
+    Args:
+        path: The path of the checkpoint folder.
+
+    Returns:
+        found: True if the checkpoint folder holds a checkpoint.
+
+    """
+    found = os.path.exists(os.path.join(path,'state.npy'))
+
+    return found
+
+
+def create_checkpoint(path,shape,max_sweeps,parameters,window=0,guard=False):
+    """This function creates the files of a new checkpoint, replacing any checkpoint already in the folder.
+
+    Args:
+        path: The path of the checkpoint folder, which is created if it does not exist.
+        shape: The shape of the padded solution grids - a tuple of two integers.
+        max_sweeps: The maximum number of iterations, the length of the error arrays.
+        parameters: Dictionary of the arguments of the run, saved to check a resumed run matches.
+        window: The number of past sweeps kept for Anderson acceleration, 0 for none.
+        guard: If True, the last good state of the divergence guard is saved, as when max_restarts is above 0.
+
+    Returns:
+        store: Dictionary of the memory-mapped arrays 'S', 'W', 'S_err', 'W_err' and 'state', with a window the
+            past sweeps 'anderson' and their dot products and position 'anderson_state', and with the guard the last
+            good grids 'S_good' and 'W_good'.
+
+    """
+    os.makedirs(path,exist_ok=True)
+
+    with open(os.path.join(path,'parameters.json'),'w') as file:
+        json.dump(parameters,file,indent=4)
+
+    # Remove the state first, so the folder does not hold a checkpoint until the first one is written
+    if has_checkpoint(path):
+        os.remove(os.path.join(path,'state.npy'))
+
+    shapes = [('S',(2,) + shape),('W',(2,) + shape),('S_err',(max_sweeps,)),('W_err',(max_sweeps,))]
+    if window > 0:
+        # The changes G and F of each past sweep and the last swept grids and residuals, then the dot products, the
+        # number of entries, the next slot and the smallest residual
+        shapes += [('anderson',(2,2*window + 2,2) + shape),('anderson_state',(2,window*window + 3))]
+    if guard:
+        shapes += [('S_good',(2,) + shape),('W_good',(2,) + shape)]
+
+    store = {}
+    for name,store_shape in shapes:
+        store[name] = np.lib.format.open_memmap(os.path.join(path,name + '.npy'),mode='w+',dtype=float,
+                                                shape=store_shape)
+
+    # The state is the slot holding the grids, the next sweep, the relaxation factors, whether Newton has started,
+    # and the sweep of the last good state, the smallest error since it and the number of restarts
+    store['state'] = np.zeros(8)
+    store['path'] = path
+
+    return store
+
+
+def open_checkpoint(path,parameters):
+    """This function opens the files of an existing checkpoint to continue the run.
+
+    Args:
+        path: The path of the checkpoint folder.
+        parameters: Dictionary of the arguments of the run, which must match those saved in the checkpoint.
+
+    Returns:
+        store: Dictionary of the memory-mapped arrays as from create_checkpoint.
+
+    """
+    with open(os.path.join(path,'parameters.json')) as file:
+        saved = json.load(file)
+
+    different = sorted(name for name in set(saved) | set(parameters) if saved.get(name) != parameters.get(name))
+    if different:
+        raise ValueError("The checkpoint was saved with different arguments: " + ", ".join(different))
+
+    store = {}
+    for name in ('S','W','S_err','W_err','state','anderson','anderson_state','S_good','W_good'):
+        optional = name.startswith('anderson') or name.endswith('_good')
+        if optional and not os.path.exists(os.path.join(path,name + '.npy')):
+            continue
+        store[name] = np.lib.format.open_memmap(os.path.join(path,name + '.npy'),mode='r+')
+    store['path'] = path
+
+    if len(store['state']) != 8:
+        raise ValueError("The checkpoint was saved by an older version of the solver and cannot be resumed")
+
+    return store
+
+
+def write_checkpoint(store,S,W,S_err,W_err,k,relax_S,relax_W,newton_started,anderson=None,guard=None):
+    """This function writes the state of the run at the start of sweep k to the checkpoint.
+
+    Args:
+        store: The checkpoint from create_checkpoint or open_checkpoint.
+        S: Stream grid - a 2D numpy array.
+        W: Vorticity grid - a 2D numpy array.
+        S_err: Numpy array of the relative errors for each iteration of the stream function grid.
+        W_err: Numpy array of the relative errors for each iteration of the vorticity function grid.
+        k: The next sweep of the run.
+        relax_S: The current relaxation factor for the stream function update.
+        relax_W: The current relaxation factor for the vorticity update.
+        newton_started: Whether the run has started taking Newton steps.
+        anderson: The window of past sweeps from create_anderson, or None without Anderson acceleration.
+        guard: Dictionary of the last good grids 'S' and 'W', the sweep 'k' they were saved at, the smallest error
+            'best_err' since then and the number of 'restarts', or None without the divergence guard.
+
+    """
+    state = store['state']
+    slot = 1 - int(state[0])
+    last_k = int(state[1])
+
+    # Write the grids into the slot not in use, and the errors since the last checkpoint
+    store['S'][slot] = S
+    store['W'][slot] = W
+    store['S_err'][last_k:k] = S_err[last_k:k]
+    store['W_err'][last_k:k] = W_err[last_k:k]
+    names = ['S','W','S_err','W_err']
+    if anderson is not None:
+        window = len(anderson['G'])
+        store['anderson'][slot,:window] = anderson['G']
+        store['anderson'][slot,window:2*window] = anderson['F']
+        store['anderson'][slot,2*window] = anderson['last_G']
+        store['anderson'][slot,2*window + 1] = anderson['last_F']
+        store['anderson_state'][slot] = np.concatenate((anderson['gram'].ravel(),
+                                                        [anderson['count'],anderson['slot'],anderson['best']]))
+        names += ['anderson','anderson_state']
+    guard_state = [0,0,0]
+    if guard is not None:
+        store['S_good'][slot] = guard['S']
+        store['W_good'][slot] = guard['W']
+        guard_state = [guard['k'],guard['best_err'],guard['restarts']]
+        names += ['S_good','W_good']
+    for name in names:
+        store[name].flush()
+
+    # Switch to the new slot once its grids are on disk
+    new_state = np.array([slot,k,relax_S,relax_W,newton_started] + guard_state,dtype=float)
+    if isinstance(state,np.memmap):
+        state[:] = new_state
+        state.flush()
+    else:
+        # The first state file is written whole and then renamed, so it never exists half written
+        state_path = os.path.join(store['path'],'state.npy')
+        np.save(state_path + '.tmp.npy',new_state)
+        os.replace(state_path + '.tmp.npy',state_path)
+        store['state'] = np.lib.format.open_memmap(state_path,mode='r+')
+
+
+def read_checkpoint(store):
+    """This function reads the state of the run from the last checkpoint written.
+
+    Args:
+        store: The checkpoint from open_checkpoint.
+
+    Returns:
+        S: Stream grid - a 2D numpy array.
+        W: Vorticity grid - a 2D numpy array.
+        S_err: Numpy array of the relative errors before sweep k.
+        W_err: Numpy array of the relative errors before sweep k.
+        k: The next sweep of the run.
+        relax_S: The relaxation factor for the stream function update.
+        relax_W: The relaxation factor for the vorticity update.
+        newton_started: Whether the run has started taking Newton steps.
+
+    """
+    slot,k,relax_S,relax_W,newton_started = store['state'][:5]
+    slot,k = int(slot),int(k)
+
+    S = np.array(store['S'][slot])
+    W = np.array(store['W'][slot])
+    S_err = np.array(store['S_err'][:k])
+    W_err = np.array(store['W_err'][:k])
+
+    return S,W,S_err,W_err,k,relax_S,relax_W,bool(newton_started)
+
+
+def read_anderson(store,anderson):
+    """This function reads the window of past sweeps from the last checkpoint written into the ring buffer.
+
+    Args:
+        store: The checkpoint from open_checkpoint, created with the same window.
+        anderson: The ring buffer from create_anderson, which is overwritten.
+
+    """
+    slot = int(store['state'][0])
+    window = len(anderson['G'])
+
+    anderson['G'][:] = store['anderson'][slot,:window]
+    anderson['F'][:] = store['anderson'][slot,window:2*window]
+    anderson['last_G'][:] = store['anderson'][slot,2*window]
+    anderson['last_F'][:] = store['anderson'][slot,2*window + 1]
+
+    saved = store['anderson_state'][slot]
+    anderson['gram'][:] = saved[:window*window].reshape(window,window)
+    anderson['count'],anderson['slot'],anderson['best'] = int(saved[-3]),int(saved[-2]),float(saved[-1])
+
+
+def read_guard(store):
+    """This function reads the state of the divergence guard from the last checkpoint written.
+
+    Args:
+        store: The checkpoint from open_checkpoint, created with the guard.
+
+    Returns:
+        guard: Dictionary of the last good grids 'S' and 'W', the sweep 'k' they were saved at, the smallest error
+            'best_err' since then and the number of 'restarts', as given to write_checkpoint.
+
+    """
+    slot = int(store['state'][0])
+    good_k,best_err,restarts = store['state'][5:8]
+
+    guard = {'S': np.array(store['S_good'][slot]), 'W': np.array(store['W_good'][slot]), 'k': int(good_k),
+             'best_err': float(best_err), 'restarts': int(restarts)}
+
+    return guard
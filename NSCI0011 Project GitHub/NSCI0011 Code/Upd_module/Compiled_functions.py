@@ -0,0 +1,195 @@
+"""This file contains documentation for the compiled functions.
+
+These functions are Numba versions of a full Gauss-Seidel iteration, fusing apply_update_rules and
+apply_boundary_conditions into one compiled loop. They use the same stencils and boundary conditions in the same order,
+so they give the same results as the NumPy versions.
+If Numba is not installed, the functions run as plain Python and select_backend falls back to the NumPy versions.
+
+"""
+import warnings
+
+try:
+    from numba import njit, prange
+    numba_available = True
+except ImportError:
+    numba_available = False
+
+    def njit(*args, **kwargs):
+        """Stands in for numba.njit when Numba is not installed, leaving the function uncompiled."""
+        return lambda func: func
+
+    prange = range
+
+
+@njit(cache=True)
+def update_point(S,W,R,h,i,j,relax_S,relax_W):
+    """This function applies the relaxed update rule to a single grid point, as in apply_update_rules.
+
+    Args:
+        S: Stream grid - a 2D numpy array.
+        W: Vorticity grid - a 2D numpy array.
+        R: Grid Reynolds number.
+        h: The unit of equal grid spacing.
+        i: The index of the point along the x-axis.
+        j: The index of the point along the y-axis.
+        relax_S: The relaxation factor for the stream function update - a float between 0-2.
+        relax_W: The relaxation factor for the vorticity update - a float between 0-2.
+
+    """
+    S_new = (1/4) * (S[i+1,j] + S[i-1,j] + S[i,j+1] + S[i,j-1] + ((h**2)*W[i,j]))
+    S[i,j] = (1-relax_S)*S[i,j] + relax_S*S_new
+    W_new = (1/4) * (W[i+1,j]+W[i-1,j]+W[i,j+1]+W[i,j-1]) - (
+        (R/16)*(((S[i,j+1]-S[i,j-1])*(W[i+1,j]-W[i-1,j]))-((S[i+1,j]-S[i-1,j])*(W[i,j+1]-W[i,j-1])))
+    )
+    W[i,j] = (1-relax_W)*W[i,j] + relax_W*W_new
+
+
+@njit(cache=True)
+def bound_compiled(S,W,h,beamfront,beamback,beamtop):
+    """This function applies the grid and beam boundary conditions in the same order as apply_boundary_conditions.
+
+    Args:
+        S: Stream grid - a 2D numpy array.
+        W: Vorticity grid - a 2D numpy array.
+        h: The unit of equal grid spacing.
+        beamfront: The integer index along the x-axis where the beamfront DE is located.
+        beamback: The integer index along the x-axis there the beamback FG is located.
+        beamtop: The integer index along the y-axis where the beamtop EF is located.
+
+    """
+    stop_index_i,stop_index_j = S.shape
+
+    # Inlet (AB) and Outlet (CH) Conditions
+    for j in range(stop_index_j):
+        S[0,j] = S[2,j]
+        W[1,j] = 0
+        S[-1,j] = S[-3,j]
+        W[-1,j] = W[-3,j]
+
+    # Surface (BC) and Centreline (AH) Conditions
+    for i in range(stop_index_i):
+        S[i,-1] = S[i,-3] + 2*h
+        W[i,-2] = 0
+        S[i,0] = 0
+        W[i,0] = 0
+
+    # Beamfront (DE) and Beamback (FG) Conditions
+    for i in (beamfront,beamback):
+        for j in range(beamtop+1):
+            S[i,j] = 0
+        for j in range(beamtop+1):
+            W[i,j] = -(S[i+1,j]-(2*S[i,j])+S[i-1,j])/h**2
+
+    # Beamtop Conditions (Top EF)
+    for i in range(beamfront,beamback+1):
+        S[i,beamtop] = 0
+    for i in range(beamfront,beamback+1):
+        W[i,beamtop] = -(S[i,beamtop+1]-(2*S[i,beamtop])+S[i,beamtop-1])/h**2
+
+
+@njit(cache=True)
+def sweep_lexicographic(S,W,R,h,beamfront,beamback,beamtop,relax_S,relax_W):
+    """This function performs one lexicographic Gauss-Seidel iteration, as apply_sweep with 'lexicographic' ordering.
+
+    Args:
+        S: Stream grid - a 2D numpy array.
+        W: Vorticity grid - a 2D numpy array.
+        R: Grid Reynolds number.
+        h: The unit of equal grid spacing.
+        beamfront: The integer index along the x-axis where the beamfront DE is located.
+        beamback: The integer index along the x-axis there the beamback FG is located.
+        beamtop: The integer index along the y-axis where the beamtop EF is located.
+        relax_S: The relaxation factor for the stream function update - a float between 0-2.
+        relax_W: The relaxation factor for the vorticity update - a float between 0-2.
+
+    """
+    stop_index_i,stop_index_j = S.shape
+
+    for i in range(1,stop_index_i - 1):
+        for j in range(1,stop_index_j - 1):
+            update_point(S,W,R,h,i,j,relax_S,relax_W)
+
+    bound_compiled(S,W,h,beamfront,beamback,beamtop)
+
+
+@njit(cache=True,parallel=True)
+def sweep_redblack(S,W,R,h,beamfront,beamback,beamtop,relax_S,relax_W):
+    """This function performs one red-black Gauss-Seidel iteration, as apply_sweep with 'red-black' ordering.
+    The points of each colour are independent, so the rows of each colour are shared between all available cores.
+
+    Args:
+        S: Stream grid - a 2D numpy array.
+        W: Vorticity grid - a 2D numpy array.
+        R: Grid Reynolds number.
+        h: The unit of equal grid spacing.
+        beamfront: The integer index along the x-axis where the beamfront DE is located.
+        beamback: The integer index along the x-axis there the beamback FG is located.
+        beamtop: The integer index along the y-axis where the beamtop EF is located.
+        relax_S: The relaxation factor for the stream function update - a float between 0-2.
+        relax_W: The relaxation factor for the vorticity update - a float between 0-2.
+
+    """
+    stop_index_i,stop_index_j = S.shape
+
+    for colour in range(2):
+        for i in prange(1,stop_index_i - 1):
+            # The first point of the colour in row i, as in get_colour_blocks
+            start_j = 1 + ((i + 1 + colour) % 2)
+            for j in range(start_j,stop_index_j - 1,2):
+                update_point(S,W,R,h,i,j,relax_S,relax_W)
+
+        bound_compiled(S,W,h,beamfront,beamback,beamtop)
+
+
+def select_backend(backend):
+    """This function checks the requested backend is available, falling back to 'numpy' if Numba is not installed.
+
+    Args:
+        backend: The requested backend - 'numpy' or 'numba'.
+
+    Returns:
+        backend: The backend that will be used.
+
+    """
+    if backend not in ('numpy','numba'):
+        raise ValueError("backend must be 'numpy' or 'numba'")
+
+    if backend == 'numba' and not numba_available:
+        warnings.warn("Numba is not installed, falling back to the 'numpy' backend")
+        backend = 'numpy'
+
+    return backend
+
+
+def apply_sweep_compiled(S,W,R,h,beamfront,beamback,beamtop,ordering='lexicographic',relax_S=1,relax_W=1):
+    """This function performs one full Gauss-Seidel iteration with the compiled sweeps.
+    The first call for each ordering compiles the sweep, which Numba caches to disk for later runs.
+
+    Args:
+        S: Stream grid - a 2D numpy array.
+        W: Vorticity grid - a 2D numpy array.
+        R: Grid Reynolds number.
+        h: The unit of equal grid spacing.
+        beamfront: The integer index along the x-axis where the beamfront DE is located.
+        beamback: The integer index along the x-axis there the beamback FG is located.
+        beamtop: The integer index along the y-axis where the beamtop EF is located.
+        ordering: The order grid points are updated in - 'lexicographic' or 'red-black'.
+        relax_S: The relaxation factor for the stream function update - a float between 0-2.
+        relax_W: The relaxation factor for the vorticity update - a float between 0-2.
+
+    Returns:
+        S: The input stream grid updated by one Gauss-Seidel iteration with all boundary conditions applied.
+        W: The input vorticity grid updated by one Gauss-Seidel iteration with all boundary conditions applied.
+
+    """
+    # Pass the factors as floats so each sweep is only compiled once
+    relax_S,relax_W = float(relax_S),float(relax_W)
+
+    if ordering == 'lexicographic':
+        sweep_lexicographic(S,W,R,h,beamfront,beamback,beamtop,relax_S,relax_W)
+    elif ordering == 'red-black':
+        sweep_redblack(S,W,R,h,beamfront,beamback,beamtop,relax_S,relax_W)
+    else:
+        raise ValueError("ordering must be 'lexicographic' or 'red-black'")
+
+    return S,W
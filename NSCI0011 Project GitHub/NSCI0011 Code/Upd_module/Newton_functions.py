@@ -0,0 +1,239 @@
+"""This file contains documentation for the Newton functions.
+
+These functions solve for the steady solution directly with Newton's method, in place of Gauss-Seidel sweeps.
+The unknowns are the values of S and W at the free points, the points of the loop range that are not overwritten by
+the boundary conditions. The full grids are rebuilt from them with apply_boundary_conditions, and the residual at each
+free point is the change one update with apply_update_rules_redblack would make there.
+The residual is zero exactly when the grids are a fixed point of the red-black Gauss-Seidel sweeps, so these
+functions solve the discrete equations with the boundary conditions at every point, and converge to the same solution
+as the red-black sweeps. This is not the solution of the lexicographic sweeps, which use the interim values of the
+beam faces, see apply_sweep.
+As in the updating functions, the (i,j) indexing of the grids should be treated as (x,y).
+
+"""
+import numpy as np
+from Upd_module.Updating_functions import apply_update_rules_redblack, apply_boundary_conditions
+
+try:
+    import scipy.sparse as sparse
+    import scipy.sparse.linalg as sparse_linalg
+    scipy_available = True
+except ImportError:
+    scipy_available = False
+
+
+def get_free_points(shape,beamfront,beamback,beamtop):
+    """This function finds the points of the solution grids that are not set by the boundary conditions.
+
+    Args:
+        shape: The shape of the padded solution grids - a tuple of two integers.
+        beamfront: The integer index along the x-axis where the beamfront DE is located.
+        beamback: The integer index along the x-axis there the beamback FG is located.
+        beamtop: The integer index along the y-axis where the beamtop EF is located.
+
+    Returns:
+        free_S: A 2D boolean numpy array that is True at the free points of the stream grid.
+        free_W: A 2D boolean numpy array that is True at the free points of the vorticity grid.
+
+    """
+    free_S = np.zeros(shape,dtype=bool)
+    free_S[1:-1,1:-1] = True
+
+    # Beamfront (DE), Beamback (FG) and Beamtop (EF) Conditions
+    free_S[beamfront,0:beamtop+1] = False
+    free_S[beamback,0:beamtop+1] = False
+    free_S[beamfront:beamback+1,beamtop] = False
+
+    # Inlet (AB) and Surface (BC) Conditions also fix the vorticity
+    free_W = free_S.copy()
+    free_W[1,:] = False
+    free_W[:,-2] = False
+
+    return free_S,free_W
+
+
+def set_free_points(X,S,W,h,beamfront,beamback,beamtop,free_S,free_W):
+    """This function writes the values of the free points into the solution grids and applies the boundary conditions.
+
+    Args:
+        X: The values at the free points, the stream points followed by the vorticity points - a 1D numpy array.
+        S: Stream grid - a 2D numpy array.
+        W: Vorticity grid - a 2D numpy array.
+        h: The unit of equal grid spacing.
+        beamfront: The integer index along the x-axis where the beamfront DE is located.
+        beamback: The integer index along the x-axis there the beamback FG is located.
+        beamtop: The integer index along the y-axis where the beamtop EF is located.
+        free_S: The free points of the stream grid from get_free_points.
+        free_W: The free points of the vorticity grid from get_free_points.
+
+    Returns:
+        S: The input stream grid holding X with all boundary conditions applied.
+        W: The input vorticity grid holding X with all boundary conditions applied.
+
+    """
+    num_S = np.count_nonzero(free_S)
+    S[free_S] = X[:num_S]
+    W[free_W] = X[num_S:]
+
+    S,W = apply_boundary_conditions(S,W,h,beamfront,beamback,beamtop)
+
+    return S,W
+
+
+def find_residual(X,S,W,R,n,h,beamfront,beamback,beamtop,free_S,free_W):
+    """This function finds the residual of the discrete equations at the free points.
+    Every point of one colour only depends on points of the other colour, so updating each colour from the same grids
+    applies the update rule to every point at once, without the Gauss-Seidel ordering.
+
+    Args:
+        X: The values at the free points, the stream points followed by the vorticity points - a 1D numpy array.
+        S: Stream grid - a 2D numpy array, used to hold the values outside the free points.
+        W: Vorticity grid - a 2D numpy array, used to hold the values outside the free points.
+        R: Grid Reynolds number.
+        n: Number of divisions in the y-direction between 0-1 inclusively.
+        h: The unit of equal grid spacing.
+        beamfront: The integer index along the x-axis where the beamfront DE is located.
+        beamback: The integer index along the x-axis there the beamback FG is located.
+        beamtop: The integer index along the y-axis where the beamtop EF is located.
+        free_S: The free points of the stream grid from get_free_points.
+        free_W: The free points of the vorticity grid from get_free_points.
+
+    Returns:
+        F: The new value minus the current value at each free point - a 1D numpy array ordered as X.
+
+    """
+    S,W = set_free_points(X,S,W,h,beamfront,beamback,beamtop,free_S,free_W)
+
+    S_red,W_red = apply_update_rules_redblack(S.copy(),W.copy(),R,n,h,0)
+    S_black,W_black = apply_update_rules_redblack(S.copy(),W.copy(),R,n,h,1)
+
+    i,j = np.indices(S.shape)
+    red = (i + j) % 2 == 0
+    S_new = np.where(red,S_red,S_black)
+    W_new = np.where(red,W_red,W_black)
+
+    F = np.concatenate((S_new[free_S],W_new[free_W])) - X
+
+    return F
+
+
+def find_jacobian(X,S,W,R,n,h,beamfront,beamback,beamtop,free_S,free_W,spacing=5):
+    """This function finds the sparse Jacobian matrix of the residual from find_residual.
+
+    The residual at a point only depends on the free points up to 2 points away, through the update rule and
+    the beam conditions. So the free points are split into groups spaced 5 points apart in each direction,
+    and each group is perturbed at once, as no residual depends on two points of the same group.
+    The residual is quadratic in X, so central differences give the exact derivatives.
+
+    Args:
+        X: The values at the free points, the stream points followed by the vorticity points - a 1D numpy array.
+        S: Stream grid - a 2D numpy array, used to hold the values outside the free points.
+        W: Vorticity grid - a 2D numpy array, used to hold the values outside the free points.
+        R: Grid Reynolds number.
+        n: Number of divisions in the y-direction between 0-1 inclusively.
+        h: The unit of equal grid spacing.
+        beamfront: The integer index along the x-axis where the beamfront DE is located.
+        beamback: The integer index along the x-axis there the beamback FG is located.
+        beamtop: The integer index along the y-axis where the beamtop EF is located.
+        free_S: The free points of the stream grid from get_free_points.
+        free_W: The free points of the vorticity grid from get_free_points.
+        spacing: The spacing between the points of each group.
+
+    Returns:
+        J: The Jacobian matrix - a scipy sparse matrix with a row and column for each free point.
+
+    """
+    num_S = np.count_nonzero(free_S)
+    offset = spacing//2
+
+    # Number the free points in the order of X, along with their positions
+    rows_i,rows_j = [],[]
+    index = []
+    for field,free in enumerate((free_S,free_W)):
+        field_index = -np.ones(free.shape,dtype=int)
+        field_index[free] = np.arange(np.count_nonzero(free)) + field*num_S
+        index.append(field_index)
+        points_i,points_j = np.nonzero(free)
+        rows_i.append(points_i)
+        rows_j.append(points_j)
+    rows_i,rows_j = np.concatenate(rows_i),np.concatenate(rows_j)
+
+    rows,cols,vals = [],[],[]
+    for field,free in enumerate((free_S,free_W)):
+        points_i,points_j = np.nonzero(free)
+        for group_i in range(spacing):
+            for group_j in range(spacing):
+                group = (points_i % spacing == group_i) & (points_j % spacing == group_j)
+                if not group.any():
+                    continue
+
+                V = np.zeros_like(X)
+                V[index[field][points_i[group],points_j[group]]] = 1
+
+                dF = (find_residual(X + V,S,W,R,n,h,beamfront,beamback,beamtop,free_S,free_W)
+                      - find_residual(X - V,S,W,R,n,h,beamfront,beamback,beamtop,free_S,free_W))/2
+
+                # Find the point of the group each residual depends on
+                changed = np.nonzero(dF)[0]
+                col_i = rows_i[changed] + (group_i - rows_i[changed] + offset) % spacing - offset
+                col_j = rows_j[changed] + (group_j - rows_j[changed] + offset) % spacing - offset
+                inside = (col_i >= 0) & (col_i < free.shape[0]) & (col_j >= 0) & (col_j < free.shape[1])
+                col = -np.ones(len(changed),dtype=int)
+                col[inside] = index[field][col_i[inside],col_j[inside]]
+
+                keep = col >= 0
+                rows.append(changed[keep])
+                cols.append(col[keep])
+                vals.append(dF[changed[keep]])
+
+    J = sparse.csc_matrix((np.concatenate(vals),(np.concatenate(rows),np.concatenate(cols))),shape=(len(X),len(X)))
+
+    # Restore the grids to X
+    set_free_points(X,S,W,h,beamfront,beamback,beamtop,free_S,free_W)
+
+    return J
+
+
+def newton_step(S,W,R,n,h,beamfront,beamback,beamtop,max_halvings=10):
+    """This function performs one Newton iteration on the free points of the solution grids.
+    The full Newton step is taken if it reduces the residual, otherwise it is halved until it does.
+
+    Args:
+        S: Stream grid - a 2D numpy array.
+        W: Vorticity grid - a 2D numpy array.
+        R: Grid Reynolds number.
+        n: Number of divisions in the y-direction between 0-1 inclusively.
+        h: The unit of equal grid spacing.
+        beamfront: The integer index along the x-axis where the beamfront DE is located.
+        beamback: The integer index along the x-axis there the beamback FG is located.
+        beamtop: The integer index along the y-axis where the beamtop EF is located.
+        max_halvings: The maximum number of times the step is halved.
+
+    Returns:
+        S: The input stream grid updated by one Newton iteration with all boundary conditions applied.
+        W: The input vorticity grid updated by one Newton iteration with all boundary conditions applied.
+
+    """
+    if not scipy_available:
+        raise ImportError("The Newton solver requires SciPy")
+
+    free_S,free_W = get_free_points(S.shape,beamfront,beamback,beamtop)
+    X = np.concatenate((S[free_S],W[free_W]))
+
+    F = find_residual(X,S,W,R,n,h,beamfront,beamback,beamtop,free_S,free_W)
+    J = find_jacobian(X,S,W,R,n,h,beamfront,beamback,beamtop,free_S,free_W)
+    # The Jacobian has a symmetric sparsity pattern, which this column ordering makes use of
+    step = sparse_linalg.spsolve(J,-F,permc_spec='MMD_AT_PLUS_A')
+
+    # Backtrack until the residual is reduced
+    F_norm = np.linalg.norm(F)
+    scale = 1
+    for halving in range(max_halvings):
+        F_trial = find_residual(X + scale*step,S,W,R,n,h,beamfront,beamback,beamtop,free_S,free_W)
+        if np.linalg.norm(F_trial) < F_norm:
+            break
+        scale = scale/2
+
+    S,W = set_free_points(X + scale*step,S,W,h,beamfront,beamback,beamtop,free_S,free_W)
+
+    return S,W
@@ -0,0 +1,274 @@
+"""This file contains documentation for the obstacle functions.
+
+These functions solve for the flow around any set of obstacles given as a solid mask of the padded grids, in place of
+the single beam of get_beam and beam_bound. The mask can be built from several rectangles on the centreline, or given
+as any rasterised shape.
+When the mask is set up, the flat indices of the fluid points and of the wall points are found once and kept in a
+table, so each sweep updates the fluid points only, and applies the wall conditions to every wall in one gather and
+one scatter.
+The stream function is 0 on every obstacle, as on the beam, which treats each obstacle as lying on the centreline
+streamline, so get_mask rejects any obstacle that does not touch the centreline. The points inside an obstacle are not
+updated, so the wall vorticity is found with Thom's formula from the fluid point next to the wall, rather than from a
+difference across the wall as in beam_bound.
+As in the updating functions, the (i,j) indexing of the grids should be treated as (x,y), and the grids must be
+C-contiguous so their flat views can be written to.
+
+"""
+import hashlib
+import numpy as np
+from Upd_module.Updating_functions import get_beam, grid_bound
+
+
+def get_mask(shape,x,y,obstacles):
+    """This function finds the solid points of the padded grids.
+
+    Args:
+        shape: The shape of the padded solution grids - a tuple of two integers.
+        x: The array of points along the x-axis.
+        y: The array of points along the y-axis.
+        obstacles: List of rectangles on the centreline, each (start_at,prop_width,prop_height) as the arguments of
+            get_beam, or a boolean numpy array of the shape of the padded grids that is True at the solid points.
+            Every obstacle must touch the centreline, or a ValueError is raised.
+
+    Returns:
+        solid: A boolean numpy array of the shape of the padded grids, True at the solid points.
+
+    """
+    if isinstance(obstacles,np.ndarray):
+        if obstacles.shape != tuple(shape):
+            raise ValueError("The solid mask must have the shape of the padded grids, " + str(tuple(shape)))
+        solid = obstacles.astype(bool)
+
+    else:
+        solid = np.zeros(shape,dtype=bool)
+        for start_at,prop_width,prop_height in obstacles:
+            front,back,top = get_beam(start_at,prop_width,prop_height,x,y)
+            solid[front:back+1,0:top+1] = True
+
+    if np.any(solid & ~touches_centreline(solid)):
+        raise ValueError("Every obstacle must touch the centreline, as the stream function is 0 on each obstacle")
+
+    return solid
+
+
+def touches_centreline(solid):
+    """This function finds the solid points that are joined to the centreline through other solid points.
+    The solid points on the centreline are grown into their solid neighbours until no more points are added.
+
+    Args:
+        solid: A boolean numpy array of the shape of the padded grids, True at the solid points.
+
+    Returns:
+        joined: A boolean numpy array of the shape of the padded grids, True at the solid points joined to the
+            centreline.
+
+    """
+    joined = np.zeros(solid.shape,dtype=bool)
+    joined[:,0] = solid[:,0]
+
+    while True:
+        grown = joined.copy()
+        grown[1:] |= joined[:-1]
+        grown[:-1] |= joined[1:]
+        grown[:,1:] |= joined[:,:-1]
+        grown[:,:-1] |= joined[:,1:]
+        grown &= solid
+        if np.array_equal(grown,joined):
+            return joined
+        joined = grown
+
+
+def describe_obstacles(obstacles):
+    """This function describes the obstacles in a form that can be saved as JSON, e.g. for the cache or checkpoints.
+
+    Args:
+        obstacles: The obstacles as in get_mask, or None.
+
+    Returns:
+        description: None, a list of the rectangles as lists of floats, or a string holding a hash of the solid mask.
+
+    """
+    if obstacles is None:
+        return None
+
+    if isinstance(obstacles,np.ndarray):
+        solid = np.ascontiguousarray(obstacles,dtype=bool)
+        return 'mask-' + hashlib.sha256(str(solid.shape).encode() + solid.tobytes()).hexdigest()
+
+    description = [[float(value) for value in rectangle] for rectangle in obstacles]
+
+    return description
+
+
+def get_tables(solid):
+    """This function finds the flat indices of the fluid points and of the wall points of the padded grids.
+    A wall point is a solid point next to a fluid point in the loop range. Its wall-normal direction points to that
+    fluid point, and where there are fluid points on more than one side, the y-direction is used over the x-direction,
+    as beam_bound does at the corners of the beam.
+
+    Args:
+        solid: A boolean numpy array of the shape of the padded grids, True at the solid points, from get_mask.
+
+    Returns:
+        tables: Dictionary of the flat indices of the 'fluid' points in the loop range in lexicographic order, the
+            fluid points of each 'colours' of the red-black checkerboard, the 'solid' points, the 'walls' points and
+            the fluid point next to each wall point along its wall-normal direction 'normals'.
+
+    """
+    stop_index_i,stop_index_j = solid.shape
+    stride = stop_index_j
+
+    # Fluid points in the loop range, which excludes the boundaries as in apply_update_rules
+    fluid = np.zeros(solid.shape,dtype=bool)
+    fluid[1:-1,1:-1] = ~solid[1:-1,1:-1]
+    i,j = np.indices(solid.shape)
+    flat = np.arange(solid.size).reshape(solid.shape)
+
+    # Find the fluid neighbour of each wall point, the later directions overwrite the earlier ones
+    normals = np.full(solid.shape,-1)
+    for di,dj in ((-1,0),(1,0),(0,-1),(0,1)):
+        inside = solid & (i + di >= 0) & (i + di < stop_index_i) & (j + dj >= 0) & (j + dj < stop_index_j)
+        neighbour = np.zeros(solid.shape,dtype=bool)
+        neighbour[inside] = fluid[i[inside] + di,j[inside] + dj]
+        normals[neighbour] = flat[neighbour] + di*stride + dj
+
+    walls = flat[normals >= 0]
+    tables = {'fluid': flat[fluid],
+              'colours': (flat[fluid & ((i + j) % 2 == 0)],flat[fluid & ((i + j) % 2 == 1)]),
+              'solid': flat[solid],
+              'walls': walls,
+              'normals': normals.ravel()[walls]}
+
+    return tables
+
+
+def apply_update_rules_masked(S,W,R,n,h,points,relax_S=1,relax_W=1):
+    """The function loops over the fluid points in order, applying the update rule to each point as in
+    apply_update_rules, and skipping the solid points.
+
+    Args:
+        S: Stream grid - a 2D numpy array.
+        W: Vorticity grid - a 2D numpy array.
+        R: Grid Reynolds number.
+        n: Number of divisions in the y-direction between 0-1 inclusively.
+        h: The unit of equal grid spacing.
+        points: Numpy array of the flat indices of the fluid points, the 'fluid' table from get_tables.
+        relax_S: The relaxation factor for the stream function update - a float between 0-2.
+        relax_W: The relaxation factor for the vorticity update - a float between 0-2.
+
+    Returns:
+        S: The input stream grid updated by one Gauss-Seidel iteration.
+        W: The input vorticity grid updated by one Gauss-Seidel iteration.
+
+    """
+    # Flat views of the grids, the neighbours along x are a whole row of the grids apart
+    S_flat,W_flat = S.reshape(-1),W.reshape(-1)
+    stride = S.shape[1]
+
+    for p in points.tolist():
+        S_new = (1/4) * (S_flat[p+stride] + S_flat[p-stride] + S_flat[p+1] + S_flat[p-1] + ((h**2)*W_flat[p]))
+        S_flat[p] = (1-relax_S)*S_flat[p] + relax_S*S_new
+        W_new = (1/4) * (W_flat[p+stride]+W_flat[p-stride]+W_flat[p+1]+W_flat[p-1]) - (
+            (R/16)*(((S_flat[p+1]-S_flat[p-1])*(W_flat[p+stride]-W_flat[p-stride]))
+                    -((S_flat[p+stride]-S_flat[p-stride])*(W_flat[p+1]-W_flat[p-1])))
+        )
+        W_flat[p] = (1-relax_W)*W_flat[p] + relax_W*W_new
+
+    return S,W
+
+
+def apply_update_rules_redblack_masked(S,W,R,n,h,points,relax_S=1,relax_W=1):
+    """The function applies the update rule to the fluid points of one colour of the red-black checkerboard at once,
+    as in apply_update_rules_redblack, gathering the neighbours of each point by their flat indices.
+
+    Args:
+        S: Stream grid - a 2D numpy array.
+        W: Vorticity grid - a 2D numpy array.
+        R: Grid Reynolds number.
+        n: Number of divisions in the y-direction between 0-1 inclusively.
+        h: The unit of equal grid spacing.
+        points: Numpy array of the flat indices of the fluid points of one colour, from the 'colours' table.
+        relax_S: The relaxation factor for the stream function update - a float between 0-2.
+        relax_W: The relaxation factor for the vorticity update - a float between 0-2.
+
+    Returns:
+        S: The input stream grid with the fluid points of one colour updated.
+        W: The input vorticity grid with the fluid points of one colour updated.
+
+    """
+    S_flat,W_flat = S.reshape(-1),W.reshape(-1)
+    stride = S.shape[1]
+
+    # Find the neighbouring points of the colour
+    east,west,north,south = points + stride,points - stride,points + 1,points - 1
+
+    S_new = (1/4) * (S_flat[east] + S_flat[west] + S_flat[north] + S_flat[south] + ((h**2)*W_flat[points]))
+    S_flat[points] = (1-relax_S)*S_flat[points] + relax_S*S_new
+    W_new = (1/4) * (W_flat[east]+W_flat[west]+W_flat[north]+W_flat[south]) - (
+        (R/16)*(((S_flat[north]-S_flat[south])*(W_flat[east]-W_flat[west]))
+                -((S_flat[east]-S_flat[west])*(W_flat[north]-W_flat[south])))
+    )
+    W_flat[points] = (1-relax_W)*W_flat[points] + relax_W*W_new
+
+    return S,W
+
+
+def wall_bound(S,W,tables,h):
+    """This function applies the boundary conditions at the walls of the obstacles.
+    The stream function is 0 on the walls, and the vorticity is found with Thom's formula, W = -2*S_f/h**2, where S_f
+    is the stream function at the fluid point next to the wall along its wall-normal direction.
+
+    Args:
+        S: Stream grid - a 2D numpy array.
+        W: Vorticity grid - a 2D numpy array.
+        tables: The flat indices of the points, from get_tables.
+        h: The unit of equal grid spacing.
+
+    Returns:
+        S: The input stream grid with its wall boundaries updated.
+        W: The input vorticity grid with its wall boundaries updated.
+
+    """
+    S_flat,W_flat = S.reshape(-1),W.reshape(-1)
+
+    S_flat[tables['walls']] = 0
+    W_flat[tables['walls']] = -2*S_flat[tables['normals']]/h**2
+
+    return S,W
+
+
+def apply_sweep_masked(S,W,R,n,h,tables,ordering='lexicographic',relax_S=1,relax_W=1):
+    """This function performs one full Gauss-Seidel iteration around the obstacles, as apply_sweep does around the beam.
+    With 'red-black' ordering the boundary conditions are applied after each colour.
+
+    Args:
+        S: Stream grid - a 2D numpy array.
+        W: Vorticity grid - a 2D numpy array.
+        R: Grid Reynolds number.
+        n: Number of divisions in the y-direction between 0-1 inclusively.
+        h: The unit of equal grid spacing.
+        tables: The flat indices of the points, from get_tables.
+        ordering: The order grid points are updated in - 'lexicographic' or 'red-black'.
+        relax_S: The relaxation factor for the stream function update - a float between 0-2.
+        relax_W: The relaxation factor for the vorticity update - a float between 0-2.
+
+    Returns:
+        S: The input stream grid updated by one Gauss-Seidel iteration with all boundary conditions applied.
+        W: The input vorticity grid updated by one Gauss-Seidel iteration with all boundary conditions applied.
+
+    """
+    if ordering == 'lexicographic':
+        S,W = apply_update_rules_masked(S,W,R,n,h,tables['fluid'],relax_S,relax_W)
+        S,W = grid_bound(S,W,h)
+        S,W = wall_bound(S,W,tables,h)
+
+    elif ordering == 'red-black':
+        for colour in (0,1):
+            S,W = apply_update_rules_redblack_masked(S,W,R,n,h,tables['colours'][colour],relax_S,relax_W)
+            S,W = grid_bound(S,W,h)
+            S,W = wall_bound(S,W,tables,h)
+
+    else:
+        raise ValueError("ordering must be 'lexicographic' or 'red-black'")
+
+    return S,W
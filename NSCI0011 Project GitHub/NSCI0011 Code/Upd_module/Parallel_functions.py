@@ -0,0 +1,313 @@
+"""This file contains documentation for the parallel functions.
+
+These functions split one large pair of solution grids into strips along the x-axis, and update each strip with
+red-black Gauss-Seidel sweeps in its own worker process.
+The grids are held in shared memory, so each worker reads the rows either side of its strip straight from its
+neighbours' strips, in place of copying halo rows between them. A barrier between each phase of the sweep makes sure
+every worker has finished writing before any worker reads - each colour is updated, then the grid boundary conditions
+are applied by the worker owning each row, and then the beam conditions are applied by the worker owning the beamfront.
+Every point is updated from the same values as in apply_sweep, so the grids after each sweep are the same as those of
+the serial sweeps. The relative errors are found from sums over each strip, so they can differ in the last digits.
+The workers are started with the 'spawn' method, as a process forked after Numba's parallel sweeps have run cannot
+exit, so a script calling these functions must guard its code with if __name__ == "__main__".
+As in the updating functions, the (i,j) indexing of the grids should be treated as (x,y).
+
+"""
+import numpy as np
+import multiprocessing
+from multiprocessing import shared_memory
+from Upd_module.Updating_functions import apply_update_rules_redblack, beam_bound, tune_relaxation, check_divergence, \
+    damp_relaxation
+
+
+def get_strips(num_rows,workers):
+    """This function splits the rows of the padded grids into one strip for each worker.
+    The loop range of rows is split as evenly as possible, and the first and last strips also hold the padding rows.
+    Every strip needs at least two rows, and the first and last strips three, as the inlet and outlet conditions copy
+    the third row from each end.
+
+    Args:
+        num_rows: The number of rows of the padded grids along the x-axis.
+        workers: The number of workers.
+
+    Returns:
+        strips: List of the (start,stop) rows of each strip.
+
+    """
+    edges = np.rint(np.linspace(1,num_rows - 1,workers + 1)).astype(int)
+    edges[0] = 0
+    edges[-1] = num_rows
+
+    strips = [(int(edges[index]),int(edges[index + 1])) for index in range(workers)]
+
+    return strips
+
+
+def grid_bound_strip(S,W,h,start,stop):
+    """This function applies the boundary conditions of grid_bound to the rows of one strip.
+    The inlet conditions are applied by the strip holding the first rows and the outlet conditions by the strip
+    holding the last rows, in the same order as grid_bound. Each end strip must hold the third row from its end, so
+    it does not read a row another worker is writing.
+
+    Args:
+        S: Stream grid - a 2D numpy array.
+        W: Vorticity grid - a 2D numpy array.
+        h: The unit of equal grid spacing.
+        start: The first row of the strip.
+        stop: The row after the last row of the strip.
+
+    """
+    # Inlet Conditions (AB)
+    if start == 0:
+        S[0,:] = S[2,:]
+        W[1,:] = 0
+
+    # Outlet Conditions (CH)
+    if stop == S.shape[0]:
+        S[-1,:] = S[-3,:]
+        W[-1,:] = W[-3,:]
+
+    # Surface Conditions (BC)
+    S[start:stop,-1] = S[start:stop,-3] + 2*h
+    W[start:stop,-2] = 0
+
+    # Centreline Conditions (AH)
+    S[start:stop,0] = 0
+    W[start:stop,0] = 0
+
+
+def attach_array(name,shape):
+    """This function opens a numpy array held in a block of shared memory.
+
+    Args:
+        name: The name of the shared memory block.
+        shape: The shape of the array.
+
+    Returns:
+        block: The shared memory block, which must be kept open while the array is in use.
+        array: The numpy array of floats held in the block.
+
+    """
+    block = shared_memory.SharedMemory(name=name)
+    array = np.ndarray(shape,dtype=float,buffer=block.buf)
+
+    return block,array
+
+
+def run_strip(names,shape,max_sweeps,index,strips,barrier,R,n,h,beamfront,beamback,beamtop,tol,relax_S,relax_W,
+              auto_relax,check_every,max_restarts,guard_every):
+    """This function runs the sweeps on one strip of the grids in a worker process.
+    Each worker finds the same relative errors from the sums of every strip, so they all make the same decisions to
+    stop, tune the relaxation factors or roll back, without messages between them. The first worker saves the errors
+    and the final state for solve_parallel.
+
+    Args:
+        names: Dictionary of the names of the shared memory blocks 'grids', 'sums', 'errors' and 'state'.
+        shape: The shape of the padded solution grids - a tuple of two integers.
+        max_sweeps: The maximum number of iterations.
+        index: The index of this worker's strip.
+        strips: List of the (start,stop) rows of each strip, from get_strips.
+        barrier: A multiprocessing barrier shared by all of the workers.
+        R: Grid Reynolds number.
+        n: Number of divisions in the y-direction between 0-1 inclusively.
+        h: The unit of equal grid spacing.
+        beamfront: The integer index along the x-axis where the beamfront DE is located.
+        beamback: The integer index along the x-axis there the beamback FG is located.
+        beamtop: The integer index along the y-axis where the beamtop EF is located.
+        tol: The tolerance for convergence of the relative errors.
+        relax_S: The relaxation factor for the stream function update.
+        relax_W: The relaxation factor for the vorticity update.
+        auto_relax: If True, the relaxation factors are tuned with tune_relaxation.
+        check_every: The number of sweeps between checks of the relative errors.
+        max_restarts: The number of times the sweeps may diverge and be restarted, as in solve.
+        guard_every: The least number of sweeps between saves of the last good state.
+
+    """
+    blocks = []
+    try:
+        block,grids = attach_array(names['grids'],(2,) + shape)
+        blocks.append(block)
+        block,sums = attach_array(names['sums'],(len(strips),4))
+        blocks.append(block)
+        block,errors = attach_array(names['errors'],(2,max_sweeps))
+        blocks.append(block)
+        block,state = attach_array(names['state'],(3,))
+        blocks.append(block)
+        S,W = grids
+
+        start,stop = strips[index]
+        # The loop range of rows in this strip, and the view of them with a row either side
+        first,last = max(start,1),min(stop,shape[0] - 1)
+        S_view,W_view = S[first-1:last+1],W[first-1:last+1]
+        owns_beam = start <= beamfront < stop
+
+        S_err = np.full(max_sweeps,np.nan)
+        W_err = np.full(max_sweeps,np.nan)
+        S_history = np.empty_like(S[start:stop])
+        W_history = np.empty_like(W[start:stop])
+
+        if max_restarts > 0:
+            S_good,W_good = S[start:stop].copy(),W[start:stop].copy()
+            good_k = 0
+            best_err = np.inf
+            restarts = 0
+
+        for k in range(max_sweeps):
+
+            # Take snapshots of this strip before the sweeps that are checked
+            check = (k + 1) % check_every == 0 or k == max_sweeps - 1
+            if check:
+                S_history[:] = S[start:stop]
+                W_history[:] = W[start:stop]
+
+            for colour in (0,1):
+                # The colour of a point in the view is shifted by the first row of the view
+                apply_update_rules_redblack(S_view,W_view,R,n,h,(colour + first - 1) % 2,relax_S,relax_W)
+                barrier.wait()
+                grid_bound_strip(S,W,h,start,stop)
+                barrier.wait()
+                if owns_beam:
+                    beam_bound(S,W,beamfront,beamback,beamtop,h)
+                barrier.wait()
+
+            if not check:
+                continue
+
+            # Add up the squared changes and values of every strip
+            for position,(grid,history) in enumerate(((S[start:stop],S_history),(W[start:stop],W_history))):
+                difference = np.subtract(grid,history,out=history).ravel()
+                values = grid.ravel()
+                sums[index,2*position] = difference.dot(difference)
+                sums[index,2*position + 1] = values.dot(values)
+            barrier.wait()
+
+            totals = sums.sum(axis=0)
+            S_residual_err = np.sqrt(totals[0])/np.sqrt(totals[1])
+            W_residual_err = np.sqrt(totals[2])/np.sqrt(totals[3])
+            S_err[k] = S_residual_err
+            W_err[k] = W_residual_err
+
+            # Roll back to the last good state and damp the sweeps if they are diverging, as in solve
+            if max_restarts > 0:
+                error = max(S_residual_err,W_residual_err)
+                if check_divergence(error,best_err):
+                    S[start:stop] = S_good
+                    W[start:stop] = W_good
+                    barrier.wait()
+                    if restarts == max_restarts:
+                        if index == 0:
+                            print('Diverged at sweep',k,'- stopping after',restarts,'restarts')
+                        break
+
+                    restarts += 1
+                    relax_S,relax_W = damp_relaxation(relax_S,relax_W)
+                    best_err = np.inf
+                    if index == 0:
+                        print('Diverged at sweep',k,'- restarting from sweep',good_k,'with relax_S =',relax_S,
+                              'and relax_W =',relax_W)
+                    continue
+
+                best_err = min(best_err,error)
+                if k + 1 - good_k >= guard_every and error <= 2*best_err:
+                    S_good[:] = S[start:stop]
+                    W_good[:] = W[start:stop]
+                    good_k = k + 1
+
+            if S_residual_err <= tol and W_residual_err <= tol:
+                break
+
+            # Adjust the relaxation factors
+            if auto_relax:
+                relax_S,relax_W = tune_relaxation(relax_S,relax_W,S_err[:k+1],W_err[:k+1],R)
+
+        if index == 0:
+            errors[0] = S_err
+            errors[1] = W_err
+            state[:] = (k,relax_S,relax_W)
+
+    except BaseException:
+        # Release the other workers from the barrier so they do not wait forever
+        barrier.abort()
+        raise
+
+    # The arrays must be released before their blocks can be closed
+    del S,W,S_view,W_view,grids,sums,errors,state
+    for block in blocks:
+        block.close()
+
+
+def solve_parallel(S,W,R,n,h,beamfront,beamback,beamtop,max_sweeps,tol,workers,relax_S=1,relax_W=1,
+                   auto_relax=False,check_every=1,max_restarts=4,guard_every=50):
+    """This function iterates the solution grids to convergence with red-black sweeps split across worker processes.
+    Each worker updates one strip of the grids from get_strips with run_strip.
+
+    Args:
+        S: Stream grid - a 2D numpy array.
+        W: Vorticity grid - a 2D numpy array.
+        R: Grid Reynolds number.
+        n: Number of divisions in the y-direction between 0-1 inclusively.
+        h: The unit of equal grid spacing.
+        beamfront: The integer index along the x-axis where the beamfront DE is located.
+        beamback: The integer index along the x-axis there the beamback FG is located.
+        beamtop: The integer index along the y-axis where the beamtop EF is located.
+        max_sweeps: The maximum number of iterations.
+        tol: The tolerance for convergence of the relative errors.
+        workers: The number of worker processes.
+        relax_S: The relaxation factor for the stream function update.
+        relax_W: The relaxation factor for the vorticity update.
+        auto_relax: If True, the relaxation factors are tuned with tune_relaxation.
+        check_every: The number of sweeps between checks of the relative errors.
+        max_restarts: The number of times the sweeps may diverge and be restarted, as in solve.
+        guard_every: The least number of sweeps between saves of the last good state.
+
+    Returns:
+        S: The stream grid after the last sweep.
+        W: The vorticity grid after the last sweep.
+        S_err: Numpy array of the relative errors for each iteration of the stream function grid, nan if not checked.
+        W_err: Numpy array of the relative errors for each iteration of the vorticity function grid, nan if not checked.
+        k: The index of the last sweep.
+        relax_S: The relaxation factor for the stream function update at the end.
+        relax_W: The relaxation factor for the vorticity update at the end.
+
+    """
+    strips = get_strips(S.shape[0],workers)
+    if min(stop - start for start,stop in strips) < 2 or strips[0][1] < 3 or strips[-1][0] > S.shape[0] - 3:
+        raise ValueError("Each worker needs at least two rows of the grids and the first and last workers three, "
+                         "use fewer workers")
+
+    shapes = {'grids': (2,) + S.shape, 'sums': (workers,4), 'errors': (2,max_sweeps), 'state': (3,)}
+    blocks = {}
+    try:
+        for name,shape in shapes.items():
+            blocks[name] = shared_memory.SharedMemory(create=True,size=8*int(np.prod(shape)))
+        grids = np.ndarray(shapes['grids'],dtype=float,buffer=blocks['grids'].buf)
+        grids[0] = S
+        grids[1] = W
+        names = {name: block.name for name,block in blocks.items()}
+
+        context = multiprocessing.get_context('spawn')
+        barrier = context.Barrier(workers)
+        processes = [context.Process(target=run_strip,
+                                             args=(names,S.shape,max_sweeps,index,strips,barrier,R,n,h,beamfront,
+                                                   beamback,beamtop,tol,relax_S,relax_W,auto_relax,check_every,
+                                                   max_restarts,guard_every))
+                     for index in range(workers)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        if any(process.exitcode != 0 for process in processes):
+            raise RuntimeError("A worker process of the parallel sweeps failed")
+
+        S,W = grids[0].copy(),grids[1].copy()
+        errors = np.ndarray(shapes['errors'],dtype=float,buffer=blocks['errors'].buf)
+        S_err,W_err = errors[0].copy(),errors[1].copy()
+        k,relax_S,relax_W = np.ndarray(shapes['state'],dtype=float,buffer=blocks['state'].buf)
+        del grids,errors
+
+    finally:
+        for block in blocks.values():
+            block.close()
+            block.unlink()
+
+    return S,W,S_err,W_err,int(k),float(relax_S),float(relax_W)
@@ -0,0 +1,97 @@
+"""This file contains documentation for the stacked functions.
+
+These functions apply a red-black Gauss-Seidel iteration to a stack of K solution grids of shape (K,nx,ny) at once,
+e.g. for K Reynolds numbers or beam placements on the same grid.
+The update rule and grid boundary conditions are those of the updating functions, applied across the whole stack.
+Each grid in the stack can have its own beam, so the beam conditions are applied with index arrays instead of slices.
+As in the updating functions, the (i,j) indexing of each grid should be treated as (x,y).
+
+"""
+import numpy as np
+from Upd_module.Updating_functions import apply_update_rules_redblack, grid_bound
+
+
+def get_beam_points(beamfront,beamback,beamtop):
+    """This function finds the points on each beam face for every grid in a stack.
+
+    Args:
+        beamfront: The integer index along the x-axis where the beamfront DE is located, for each grid - a 1D numpy array.
+        beamback: The integer index along the x-axis there the beamback FG is located, for each grid - a 1D numpy array.
+        beamtop: The integer index along the y-axis where the beamtop EF is located, for each grid - a 1D numpy array.
+
+    Returns:
+        points: A list of the (grid,i,j) index arrays of the Beamfront, Beamback and Beamtop points, in that order.
+
+    """
+    points = []
+    for face in ('front','back','top'):
+        grids,points_i,points_j = [],[],[]
+        for k in range(len(beamfront)):
+            if face == 'top':
+                face_i = np.arange(beamfront[k],beamback[k] + 1)
+                face_j = np.full(len(face_i),beamtop[k])
+            else:
+                face_j = np.arange(beamtop[k] + 1)
+                face_i = np.full(len(face_j),beamfront[k] if face == 'front' else beamback[k])
+            grids.append(np.full(len(face_i),k))
+            points_i.append(face_i)
+            points_j.append(face_j)
+        points.append((np.concatenate(grids),np.concatenate(points_i),np.concatenate(points_j)))
+
+    return points
+
+
+def beam_bound_stacked(S,W,points,h):
+    """This function applies the boundary conditions at the beam surfaces of every grid in a stack, as in beam_bound.
+
+    Args:
+        S: Stack of stream grids - a 3D numpy array.
+        W: Stack of vorticity grids - a 3D numpy array.
+        points: The beam face points from get_beam_points.
+        h: The unit of equal grid spacing.
+
+    Returns:
+        S: The input stream grids with their beam boundaries updated.
+        W: The input vorticity grids with their beam boundaries updated.
+
+    """
+    front,back,top = points
+
+    # Beamfront (DE) and Beamback (FG) conditions
+    for grid,i,j in (front,back):
+        S[grid,i,j] = 0
+        W[grid,i,j] = -(S[grid,i+1,j]-(2*S[grid,i,j])+S[grid,i-1,j])/h**2
+
+    # Beamtop conditions (Top EF)
+    grid,i,j = top
+    S[grid,i,j] = 0
+    W[grid,i,j] = -(S[grid,i,j+1]-(2*S[grid,i,j])+S[grid,i,j-1])/h**2
+
+    return S,W
+
+
+def apply_sweep_stacked(S,W,R,n,h,points,relax_S=1,relax_W=1):
+    """This function performs one red-black Gauss-Seidel iteration on every grid in a stack,
+    as apply_sweep with 'red-black' ordering.
+
+    Args:
+        S: Stack of stream grids - a 3D numpy array.
+        W: Stack of vorticity grids - a 3D numpy array.
+        R: Grid Reynolds number of each grid - a numpy array of shape (K,1,1).
+        n: Number of divisions in the y-direction between 0-1 inclusively.
+        h: The unit of equal grid spacing.
+        points: The beam face points from get_beam_points.
+        relax_S: The relaxation factor for the stream function update - a float, or an array of shape (K,1,1).
+        relax_W: The relaxation factor for the vorticity update - a float, or an array of shape (K,1,1).
+
+    Returns:
+        S: The input stream grids updated by one Gauss-Seidel iteration with all boundary conditions applied.
+        W: The input vorticity grids updated by one Gauss-Seidel iteration with all boundary conditions applied.
+
+    """
+    for colour in (0,1):
+        S,W = apply_update_rules_redblack(S,W,R,n,h,colour,relax_S,relax_W)
+        S,W = grid_bound(S,W,h)
+        S,W = beam_bound_stacked(S,W,points,h)
+
+    return S,W
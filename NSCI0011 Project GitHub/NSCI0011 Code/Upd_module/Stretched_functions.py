@@ -0,0 +1,249 @@
+"""This file contains documentation for the stretched grid functions.
+
+These functions update the solution grids on a stretched grid, where the points along each axis are not equally
+spaced, e.g. from stretch_axis, so they can be clustered near the beam and the centreline.
+The second derivatives use the three-point differences for unequal spacing, and the first derivatives the central
+differences across both neighbours. With equal spacing these are the same as the update rules and boundary conditions
+of the updating functions. The grid Reynolds number R is kept as Rey times the mean spacing in y, so a stretched grid
+solves the same equations as the equally spaced grid with the same n.
+As in the updating functions, the (i,j) indexing of the grids should be treated as (x,y).
+
+"""
+import numpy as np
+from Upd_module.Updating_functions import get_colour_blocks, shift_block, grid_bound
+
+
+def get_spacing(x,y):
+    """This function finds the spacing of the padded grid points and the coefficients of the finite differences.
+    The padded points lie one spacing of the first or last interval beyond the ends of the axes, so the ghost points
+    are still the reflections used by grid_bound.
+
+    Args:
+        x: The array of points along the x-axis.
+        y: The array of points along the y-axis.
+
+    Returns:
+        spacing: Dictionary of the coefficients of the east, west, north and south neighbours in the Laplacian,
+            'east' and 'west' of shape (nx,1) and 'north' and 'south' of shape (1,ny), the inverse of their sum
+            'inverse_centre' of shape (nx,ny), the distances between the two neighbours along each axis 'x_width' and
+            'y_width', the spacings to the previous and next points 'x_gaps' and 'y_gaps', and the spacing at the
+            'surface'.
+
+    """
+    x_pad = np.concatenate(([2*x[0] - x[1]],x,[2*x[-1] - x[-2]]))
+    y_pad = np.append(y,2*y[-1] - y[-2])
+
+    coefficients = {}
+    gaps = {}
+    for name,points in (('x',x_pad),('y',y_pad)):
+        # The gaps to the previous and next points, the padded points at the ends reuse the gap next to them
+        step = np.diff(points)
+        before = np.concatenate(([step[0]],step))
+        after = np.concatenate((step,[step[-1]]))
+        coefficients[name] = (2/(after*(before + after)),2/(before*(before + after)),before + after)
+        gaps[name] = (before,after)
+
+    east,west,x_width = coefficients['x']
+    north,south,y_width = coefficients['y']
+    spacing = {'east': east[:,None], 'west': west[:,None], 'north': north[None,:], 'south': south[None,:],
+               'inverse_centre': 1/(east[:,None] + west[:,None] + north[None,:] + south[None,:]),
+               'x_width': x_width[:,None], 'y_width': y_width[None,:], 'x_gaps': gaps['x'], 'y_gaps': gaps['y'],
+               'surface': y[-1] - y[-2]}
+
+    return spacing
+
+
+def apply_update_rules_stretched(S,W,R,spacing,relax_S=1,relax_W=1):
+    """The function loops over the solution grids, applying the update rule for unequal spacing to each point in the
+    loop range, as apply_update_rules does for equal spacing.
+
+    Args:
+        S: Stream grid - a 2D numpy array.
+        W: Vorticity grid - a 2D numpy array.
+        R: Grid Reynolds number.
+        spacing: The coefficients of the finite differences, from get_spacing.
+        relax_S: The relaxation factor for the stream function update - a float between 0-2.
+        relax_W: The relaxation factor for the vorticity update - a float between 0-2.
+
+    Returns:
+        S: The input stream grid updated by one Gauss-Seidel iteration.
+        W: The input vorticity grid updated by one Gauss-Seidel iteration.
+
+    """
+    stop_index_i,stop_index_j = S.shape
+    east,west = spacing['east'][:,0],spacing['west'][:,0]
+    north,south = spacing['north'][0],spacing['south'][0]
+    x_width,y_width = spacing['x_width'][:,0],spacing['y_width'][0]
+    inverse_centre = spacing['inverse_centre']
+
+    for i in range(1,stop_index_i - 1):
+        for j in range(1,stop_index_j - 1):
+            S_new = inverse_centre[i,j] * (east[i]*S[i+1,j] + west[i]*S[i-1,j] + north[j]*S[i,j+1] + south[j]*S[i,j-1]
+                                           + W[i,j])
+            S[i,j] = (1-relax_S)*S[i,j] + relax_S*S_new
+            W_new = inverse_centre[i,j] * (east[i]*W[i+1,j] + west[i]*W[i-1,j] + north[j]*W[i,j+1] + south[j]*W[i,j-1]
+                - R*(((S[i,j+1]-S[i,j-1])*(W[i+1,j]-W[i-1,j]))-((S[i+1,j]-S[i-1,j])*(W[i,j+1]-W[i,j-1])))
+                /(x_width[i]*y_width[j])
+            )
+            W[i,j] = (1-relax_W)*W[i,j] + relax_W*W_new
+
+    return S,W
+
+
+def apply_update_rules_redblack_stretched(S,W,R,spacing,colour,relax_S=1,relax_W=1):
+    """The function applies the update rule for unequal spacing to every point of one colour of the red-black
+    checkerboard at once, as apply_update_rules_redblack does for equal spacing.
+
+    Args:
+        S: Stream grid - a 2D numpy array.
+        W: Vorticity grid - a 2D numpy array.
+        R: Grid Reynolds number.
+        spacing: The coefficients of the finite differences, from get_spacing.
+        colour: The colour of the points to update, 0 for red and 1 for black.
+        relax_S: The relaxation factor for the stream function update - a float between 0-2.
+        relax_W: The relaxation factor for the vorticity update - a float between 0-2.
+
+    Returns:
+        S: The input stream grid with the points of one colour updated.
+        W: The input vorticity grid with the points of one colour updated.
+
+    """
+    for block in get_colour_blocks(S.shape,colour):
+
+        # Find the neighbouring points of the block, and the coefficients of the block
+        east = shift_block(block,1,0)
+        west = shift_block(block,-1,0)
+        north = shift_block(block,0,1)
+        south = shift_block(block,0,-1)
+        i_slice,j_slice = block
+        c_east,c_west = spacing['east'][i_slice],spacing['west'][i_slice]
+        c_north,c_south = spacing['north'][:,j_slice],spacing['south'][:,j_slice]
+        inverse_centre = spacing['inverse_centre'][block]
+        width = spacing['x_width'][i_slice]*spacing['y_width'][:,j_slice]
+
+        S_new = inverse_centre * (c_east*S[east] + c_west*S[west] + c_north*S[north] + c_south*S[south] + W[block])
+        S[block] = (1-relax_S)*S[block] + relax_S*S_new
+        W_new = inverse_centre * (c_east*W[east] + c_west*W[west] + c_north*W[north] + c_south*W[south]
+            - R*(((S[north]-S[south])*(W[east]-W[west]))-((S[east]-S[west])*(W[north]-W[south])))/width
+        )
+        W[block] = (1-relax_W)*W[block] + relax_W*W_new
+
+    return S,W
+
+
+def second_difference(S_previous,S_point,S_next,before,after):
+    """This function finds the second derivative of the stream function across the points, for unequal spacing.
+
+    Args:
+        S_previous: The stream function at the previous points along the axis.
+        S_point: The stream function at the points.
+        S_next: The stream function at the next points along the axis.
+        before: The spacing to the previous points.
+        after: The spacing to the next points.
+
+    Returns:
+        difference: The second derivatives at the points.
+
+    """
+    difference = 2*((S_next - S_point)/after - (S_point - S_previous)/before)/(before + after)
+
+    return difference
+
+
+def beam_bound_stretched(S,W,beamfront,beamback,beamtop,spacing):
+    """This function applies the boundary conditions at the beam surfaces, as beam_bound does for equal spacing.
+
+    Args:
+        S: Stream grid - a 2D numpy array.
+        W: Vorticity grid - a 2D numpy array.
+        beamfront: The integer index along the x-axis where the beamfront DE is located.
+        beamback: The integer index along the x-axis there the beamback FG is located.
+        beamtop: The integer index along the y-axis where the beamtop EF is located.
+        spacing: The coefficients of the finite differences, from get_spacing.
+
+    Returns:
+        S: The input stream grid with its beam boundaries updated.
+        W: The input vorticity grid with its beam boundaries updated.
+
+    """
+    x_before,x_after = spacing['x_gaps']
+    y_before,y_after = spacing['y_gaps']
+
+    # Beamfront conditions (DE)
+    S[beamfront,0:beamtop+1] = 0
+    W[beamfront,0:beamtop+1] = -second_difference(S[beamfront-1,0:beamtop+1],S[beamfront,0:beamtop+1],
+                                                  S[beamfront+1,0:beamtop+1],x_before[beamfront],x_after[beamfront])
+
+    # Beamback conditions (FG)
+    S[beamback,0:beamtop+1] = 0
+    W[beamback,0:beamtop+1] = -second_difference(S[beamback-1,0:beamtop+1],S[beamback,0:beamtop+1],
+                                                 S[beamback+1,0:beamtop+1],x_before[beamback],x_after[beamback])
+
+    # Beamtop conditions (Top EF)
+    S[beamfront:beamback+1,beamtop] = 0
+    W[beamfront:beamback+1,beamtop] = -second_difference(S[beamfront:beamback+1,beamtop-1],
+                                                         S[beamfront:beamback+1,beamtop],
+                                                         S[beamfront:beamback+1,beamtop+1],y_before[beamtop],
+                                                         y_after[beamtop])
+
+    return S,W
+
+
+def apply_sweep_stretched(S,W,R,spacing,beamfront,beamback,beamtop,ordering='lexicographic',relax_S=1,relax_W=1):
+    """This function performs one full Gauss-Seidel iteration on a stretched grid, as apply_sweep does on an equally
+    spaced grid. The surface condition of grid_bound uses the spacing at the surface.
+
+    Args:
+        S: Stream grid - a 2D numpy array.
+        W: Vorticity grid - a 2D numpy array.
+        R: Grid Reynolds number.
+        spacing: The coefficients of the finite differences, from get_spacing.
+        beamfront: The integer index along the x-axis where the beamfront DE is located.
+        beamback: The integer index along the x-axis there the beamback FG is located.
+        beamtop: The integer index along the y-axis where the beamtop EF is located.
+        ordering: The order grid points are updated in - 'lexicographic' or 'red-black'.
+        relax_S: The relaxation factor for the stream function update - a float between 0-2.
+        relax_W: The relaxation factor for the vorticity update - a float between 0-2.
+
+    Returns:
+        S: The input stream grid updated by one Gauss-Seidel iteration with all boundary conditions applied.
+        W: The input vorticity grid updated by one Gauss-Seidel iteration with all boundary conditions applied.
+
+    """
+    if ordering == 'lexicographic':
+        S,W = apply_update_rules_stretched(S,W,R,spacing,relax_S,relax_W)
+        S,W = grid_bound(S,W,spacing['surface'])
+        S,W = beam_bound_stretched(S,W,beamfront,beamback,beamtop,spacing)
+
+    elif ordering == 'red-black':
+        for colour in (0,1):
+            S,W = apply_update_rules_redblack_stretched(S,W,R,spacing,colour,relax_S,relax_W)
+            S,W = grid_bound(S,W,spacing['surface'])
+            S,W = beam_bound_stretched(S,W,beamfront,beamback,beamtop,spacing)
+
+    else:
+        raise ValueError("ordering must be 'lexicographic' or 'red-black'")
+
+    return S,W
+
+
+def get_beam_stretched(x_beam,y_beam,x,y):
+    """This function finds the indices of the stretched grid points nearest to the beam surfaces.
+
+    Args:
+        x_beam: Tuple of the positions along the x-axis of the beamfront and the beamback.
+        y_beam: The position along the y-axis of the beamtop.
+        x: The array of points along the stretched x-axis.
+        y: The array of points along the stretched y-axis.
+
+    Returns:
+        beamfront: The integer index along the x-axis where the beamfront DE is located.
+        beamback: The integer index along the x-axis there the beamback FG is located.
+        beamtop: The integer index along the y-axis where the beamtop EF is located.
+
+    """
+    # The rows of the grids are one ahead of the x-axis, as the first row is padding
+    beamfront,beamback = (int(np.argmin(np.abs(x - position))) + 1 for position in x_beam)
+    beamtop = int(np.argmin(np.abs(y - y_beam)))
+
+    return beamfront,beamback,beamtop
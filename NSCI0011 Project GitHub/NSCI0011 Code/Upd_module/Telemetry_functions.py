@@ -0,0 +1,167 @@
+"""This file contains documentation for the telemetry functions.
+
+These functions record how a run is progressing while it iterates, e.g. to spot divergence or a slow phase without
+attaching a profiler. Each record is a dictionary, which is written as one line of JSON to a JSON Lines file or to a
+local socket, and passed to a callback function.
+The time of each sweep is split into phases - 'update' for the update rules, 'boundary' for the boundary conditions,
+'residual' for the snapshots and relative errors, 'stream' for the multigrid stream solve, 'newton' for Newton
+steps, and 'anderson' for Anderson acceleration. The compiled sweeps fuse the update rules and the boundary
+conditions, and the sweeps around obstacles or on stretched grids are not split, so their time is all in 'update'.
+When there is no telemetry, the solver does not call these functions, so it runs as fast as without them.
+
+"""
+import json
+import time
+import socket
+from Upd_module.Updating_functions import apply_update_rules, apply_update_rules_redblack, apply_boundary_conditions
+
+
+def open_telemetry(target,callback,parameters,start=0):
+    """This function opens the telemetry of a run and records its start.
+
+    Args:
+        target: The path of a JSON Lines file to write the records to, 'tcp://host:port' to send them to a socket
+            listening at that address, or None to only pass them to the callback.
+        callback: A function called with each record, or None.
+        parameters: Dictionary of the arguments of the run, added to the start record.
+        start: The first sweep of the run, which is not 0 when it continues from a checkpoint.
+
+    Returns:
+        sink: Dictionary of the open 'file' and socket 'connection', the 'callback', the 'timings' of each phase since
+            the last record, and the next 'sweep' and the 'time' of the last record.
+
+    """
+    connection = None
+    if target is None:
+        file = None
+    elif target.startswith('tcp://'):
+        host,port = target[len('tcp://'):].rsplit(':',1)
+        connection = socket.create_connection((host,int(port)))
+        file = connection.makefile('w')
+    else:
+        file = open(target,'w')
+
+    sink = {'file': file, 'connection': connection, 'callback': callback, 'timings': {}, 'sweep': start,
+            'time': time.perf_counter()}
+    write_record(sink,{'event': 'start', 'time': time.time(), 'sweep': start, **parameters})
+
+    return sink
+
+
+def write_record(sink,record):
+    """This function writes a record to the telemetry file or socket and passes it to the callback.
+    The file is flushed after each record, so the records can be read while the run is in progress.
+
+    Args:
+        sink: The telemetry from open_telemetry.
+        record: Dictionary of values to record.
+
+    """
+    if sink['file'] is not None:
+        sink['file'].write(json.dumps(record) + '\n')
+        sink['file'].flush()
+
+    if sink['callback'] is not None:
+        sink['callback'](record)
+
+
+def add_time(sink,phase,start):
+    """This function adds the time since start to the time spent in a phase.
+
+    Args:
+        sink: The telemetry from open_telemetry.
+        phase: The name of the phase, e.g. 'update'.
+        start: The time the phase started, from time.perf_counter.
+
+    """
+    timings = sink['timings']
+    timings[phase] = timings.get(phase,0) + time.perf_counter() - start
+
+
+def apply_sweep_timed(S,W,R,n,h,beamfront,beamback,beamtop,sink,ordering='lexicographic',relax_S=1,relax_W=1):
+    """This function performs one full Gauss-Seidel iteration as apply_sweep, adding the time spent in the
+    update rules and in the boundary conditions to the 'update' and 'boundary' phases.
+
+    Args:
+        S: Stream grid - a 2D numpy array.
+        W: Vorticity grid - a 2D numpy array.
+        R: Grid Reynolds number.
+        n: Number of divisions in the y-direction between 0-1 inclusively.
+        h: The unit of equal grid spacing.
+        beamfront: The integer index along the x-axis where the beamfront DE is located.
+        beamback: The integer index along the x-axis there the beamback FG is located.
+        beamtop: The integer index along the y-axis where the beamtop EF is located.
+        sink: The telemetry from open_telemetry.
+        ordering: The order grid points are updated in - 'lexicographic' or 'red-black'.
+        relax_S: The relaxation factor for the stream function update - a float between 0-2.
+        relax_W: The relaxation factor for the vorticity update - a float between 0-2.
+
+    Returns:
+        S: The input stream grid updated by one Gauss-Seidel iteration with all boundary conditions applied.
+        W: The input vorticity grid updated by one Gauss-Seidel iteration with all boundary conditions applied.
+
+    """
+    if ordering == 'lexicographic':
+        colours = (None,)
+    elif ordering == 'red-black':
+        colours = (0,1)
+    else:
+        raise ValueError("ordering must be 'lexicographic' or 'red-black'")
+
+    for colour in colours:
+        start = time.perf_counter()
+        if colour is None:
+            S,W = apply_update_rules(S,W,R,n,h,relax_S,relax_W)
+        else:
+            S,W = apply_update_rules_redblack(S,W,R,n,h,colour,relax_S,relax_W)
+        add_time(sink,'update',start)
+
+        start = time.perf_counter()
+        S,W = apply_boundary_conditions(S,W,h,beamfront,beamback,beamtop)
+        add_time(sink,'boundary',start)
+
+    return S,W
+
+
+def record_sweep(sink,k,S_err,W_err,relax_S,relax_W):
+    """This function records the errors of a checked sweep, with the time spent in each phase and the number of
+    sweeps per second since the last record.
+
+    Args:
+        sink: The telemetry from open_telemetry.
+        k: The sweep that was checked.
+        S_err: The relative error of the stream function grid.
+        W_err: The relative error of the vorticity function grid.
+        relax_S: The current relaxation factor for the stream function update.
+        relax_W: The current relaxation factor for the vorticity update.
+
+    """
+    now = time.perf_counter()
+    sweeps_per_second = (k + 1 - sink['sweep'])/(now - sink['time'])
+
+    write_record(sink,{'event': 'sweep', 'sweep': k, 'S_err': float(S_err), 'W_err': float(W_err),
+                       'relax_S': float(relax_S), 'relax_W': float(relax_W), 'sweeps_per_second': sweeps_per_second,
+                       **sink['timings']})
+
+    sink['timings'] = {}
+    sink['sweep'] = k + 1
+    sink['time'] = now
+
+
+def close_telemetry(sink,sweeps,converged):
+    """This function records the end of a run and closes the telemetry file or socket.
+    The file and socket are closed even if the end record cannot be written.
+
+    Args:
+        sink: The telemetry from open_telemetry.
+        sweeps: The number of sweeps the run took.
+        converged: Whether the run converged within tol.
+
+    """
+    try:
+        write_record(sink,{'event': 'end', 'time': time.time(), 'sweeps': sweeps, 'converged': converged})
+    finally:
+        if sink['file'] is not None:
+            sink['file'].close()
+        if sink['connection'] is not None:
+            sink['connection'].close()
@@ -4,12 +4,14 @@ These functions are written with the assumption that the solution grids will be
 Hence for these functions, the (i,j) indexing of the solution grids should be treated as (x,y).
 
 """
-import pydoc
+import math
 import numpy as np
 
-def apply_update_rules(S,W,R,n,h):
+def apply_update_rules(S,W,R,n,h,relax_S=1,relax_W=1):
     """The function loops over the solution grids, applying the update rule to each point in the loop range.
     This excludes the boundaries (the top row, bottom row, and outermost columns).
+    Each new value is relaxed against the old value, (1-relax)*old + relax*new. Factors above 1 over-relax (SOR)
+    and factors below 1 under-relax, a factor of 1 is plain Gauss-Seidel.
 
     Args:
         S: Stream grid - a 2D numpy array.
@@ -17,6 +19,8 @@ def apply_update_rules(S,W,R,n,h):
         R: Grid Reynolds number.
         n: Number of divisions in the y-direction between 0-1 inclusively.
         h: The unit of equal grid spacing.
+        relax_S: The relaxation factor for the stream function update - a float between 0-2.
+        relax_W: The relaxation factor for the vorticity update - a float between 0-2.
 
     Returns:
         S: The input stream grid updated by one Gauss-Seidel iteration.
@@ -29,22 +33,110 @@ def apply_update_rules(S,W,R,n,h):
 
     for i in range(1,stop_index_i - 1):
         for j in range(1,stop_index_j - 1):
-            S[i,j] = (1/4) * (S[i+1,j] + S[i-1,j] + S[i,j+1] + S[i,j-1] + ((h**2)*W[i,j]))
-            W[i,j] = (1/4) * (W[i+1,j]+W[i-1,j]+W[i,j+1]+W[i,j-1]) - (
+            S_new = (1/4) * (S[i+1,j] + S[i-1,j] + S[i,j+1] + S[i,j-1] + ((h**2)*W[i,j]))
+            S[i,j] = (1-relax_S)*S[i,j] + relax_S*S_new
+            W_new = (1/4) * (W[i+1,j]+W[i-1,j]+W[i,j+1]+W[i,j-1]) - (
                 (R/16)*(((S[i,j+1]-S[i,j-1])*(W[i+1,j]-W[i-1,j]))-((S[i+1,j]-S[i-1,j])*(W[i,j+1]-W[i,j-1])))
-            )                                               
+            )
+            W[i,j] = (1-relax_W)*W[i,j] + relax_W*W_new
             
     return S,W
 
 
+def get_colour_blocks(shape,colour):
+    """This function finds the strided blocks of grid points that make up one colour of the red-black checkerboard.
+    A point (i,j) in the loop range is red (colour 0) if i+j is even and black (colour 1) if i+j is odd.
+    Each colour is covered by two blocks of every other row and every other column, so it can be updated by slicing.
+
+    Args:
+        shape: The shape of the solution grids - a tuple of two integers.
+        colour: The colour of the points, 0 for red and 1 for black.
+
+    Returns:
+        blocks: A list of (i_slice,j_slice) pairs, one for each block of the colour.
+
+    """
+    # Find the stopping index for the loop range, S and W are the same shape
+    stop_index_i,stop_index_j = shape
+
+    blocks = []
+    for start_i in (1,2):
+        # Rows starting at i=1 and i=2 hold the colour in alternate columns
+        start_j = 1 + ((start_i + 1 + colour) % 2)
+        blocks.append((slice(start_i,stop_index_i - 1,2), slice(start_j,stop_index_j - 1,2)))
+
+    return blocks
+
+
+def shift_block(block,di,dj):
+    """This function shifts a strided block of grid points by a fixed number of points in each direction.
+
+    Args:
+        block: An (i_slice,j_slice) pair from get_colour_blocks.
+        di: The number of points to shift by in the x-direction.
+        dj: The number of points to shift by in the y-direction.
+
+    Returns:
+        shifted: The (i_slice,j_slice) pair of the neighbouring points.
+
+    """
+    i_slice,j_slice = block
+    shifted = (slice(i_slice.start + di,i_slice.stop + di,2), slice(j_slice.start + dj,j_slice.stop + dj,2))
+
+    return shifted
+
+
+def apply_update_rules_redblack(S,W,R,n,h,colour,relax_S=1,relax_W=1):
+    """The function applies the update rule to every point of one colour of the red-black checkerboard.
+    The neighbours of a point are all of the other colour, so the whole colour is updated at once with NumPy slicing
+    instead of looping point by point. The points updated and the relaxation are the same as in apply_update_rules.
+    The grids may also be stacks of K grids of shape (K,nx,ny), with R and the relaxation factors either numbers or
+    arrays of shape (K,1,1) holding a value for each grid.
+
+    Args:
+        S: Stream grid - a 2D numpy array, or a 3D stack of grids.
+        W: Vorticity grid - a 2D numpy array, or a 3D stack of grids.
+        R: Grid Reynolds number.
+        n: Number of divisions in the y-direction between 0-1 inclusively.
+        h: The unit of equal grid spacing.
+        colour: The colour of the points to update, 0 for red and 1 for black.
+        relax_S: The relaxation factor for the stream function update - a float between 0-2.
+        relax_W: The relaxation factor for the vorticity update - a float between 0-2.
+
+    Returns:
+        S: The input stream grid with the points of one colour updated.
+        W: The input vorticity grid with the points of one colour updated.
+
+    """
+
+    for block in get_colour_blocks(S.shape[-2:],colour):
+
+        # Find the neighbouring points of the block, in every grid of a stack
+        east = (Ellipsis,) + shift_block(block,1,0)
+        west = (Ellipsis,) + shift_block(block,-1,0)
+        north = (Ellipsis,) + shift_block(block,0,1)
+        south = (Ellipsis,) + shift_block(block,0,-1)
+        block = (Ellipsis,) + block
+
+        S_new = (1/4) * (S[east] + S[west] + S[north] + S[south] + ((h**2)*W[block]))
+        S[block] = (1-relax_S)*S[block] + relax_S*S_new
+        W_new = (1/4) * (W[east]+W[west]+W[north]+W[south]) - (
+            (R/16)*(((S[north]-S[south])*(W[east]-W[west]))-((S[east]-S[west])*(W[north]-W[south])))
+        )
+        W[block] = (1-relax_W)*W[block] + relax_W*W_new
+
+    return S,W
+
+
 
 def grid_bound(S,W,h):
     """This function applies the boundary conditions to the solution grids.
     This updates the ghost points using the interior grid points and imposes fixed conditions.
+    The grids may also be stacks of grids of shape (K,nx,ny), with the conditions applied to every grid.
 
     Args:
-        S: Stream grid - a 2D numpy array.
-        W: Vorticity grid - a 2D numpy array.
+        S: Stream grid - a 2D numpy array, or a 3D stack of grids.
+        W: Vorticity grid - a 2D numpy array, or a 3D stack of grids.
         h: The unit of equal grid spacing.
         U: The background flow velocity.
 
@@ -55,20 +147,20 @@ def grid_bound(S,W,h):
     """
                 
     # Inlet Conditions (AB)
-    S[0,:] = S[2,:]
-    W[1,:] = 0
+    S[...,0,:] = S[...,2,:]
+    W[...,1,:] = 0
 
     # Outlet Conditions (CH)
-    S[-1,:] = S[-3,:]
-    W[-1,:] = W[-3,:]
+    S[...,-1,:] = S[...,-3,:]
+    W[...,-1,:] = W[...,-3,:]
 
     # Surface Conditions (BC)
-    S[:,-1] = S[:,-3] + 2*h
-    W[:,-2] = 0
+    S[...,:,-1] = S[...,:,-3] + 2*h
+    W[...,:,-2] = 0
 
     # Centreline Conditions (AH)
-    S[:,0] = 0
-    W[:,0] = 0
+    S[...,:,0] = 0
+    W[...,:,0] = 0
 
     return S,W
 
@@ -159,4 +251,172 @@ def apply_boundary_conditions(S,W,h,beamfront,beamback,beamtop):
     return S,W
 
 
-pydoc.writedoc("Updating_functions")
+def apply_sweep(S,W,R,n,h,beamfront,beamback,beamtop,ordering='lexicographic',relax_S=1,relax_W=1):
+    """This function performs one full Gauss-Seidel iteration, updating the grids and then applying the boundary conditions.
+
+    With 'lexicographic' ordering this calls apply_update_rules and then apply_boundary_conditions.
+    With 'red-black' ordering the red points are updated first and then the black points, with the boundary conditions
+    applied after each colour. This stops the interim values of boundary points, which the update rule also overwrites,
+    from being used by their neighbours.
+    The two orderings therefore converge to different solutions. With 'lexicographic' ordering, the points after a
+    beam face in the sweep use the value the update rule gave the face in place of its boundary condition, so the
+    converged grids are a fixed point of the sweep but not a solution of the discrete equations with the beam
+    conditions. With 'red-black' ordering they are. At n = 30 and Re = 100 the converged vorticity grids differ by 20%,
+    most at the back corner of the beam. The 'lexicographic' sweep is kept as it was so the original results can be
+    reproduced.
+
+    Args:
+        S: Stream grid - a 2D numpy array.
+        W: Vorticity grid - a 2D numpy array.
+        R: Grid Reynolds number.
+        n: Number of divisions in the y-direction between 0-1 inclusively.
+        h: The unit of equal grid spacing.
+        beamfront: The integer index along the x-axis where the beamfront DE is located.
+        beamback: The integer index along the x-axis there the beamback FG is located.
+        beamtop: The integer index along the y-axis where the beamtop EF is located.
+        ordering: The order grid points are updated in - 'lexicographic' or 'red-black'.
+        relax_S: The relaxation factor for the stream function update - a float between 0-2.
+        relax_W: The relaxation factor for the vorticity update - a float between 0-2.
+
+    Returns:
+        S: The input stream grid updated by one Gauss-Seidel iteration with all boundary conditions applied.
+        W: The input vorticity grid updated by one Gauss-Seidel iteration with all boundary conditions applied.
+
+    """
+    if ordering == 'lexicographic':
+        S,W = apply_update_rules(S,W,R,n,h,relax_S,relax_W)
+        S,W = apply_boundary_conditions(S,W,h,beamfront,beamback,beamtop)
+
+    elif ordering == 'red-black':
+        for colour in (0,1):
+            S,W = apply_update_rules_redblack(S,W,R,n,h,colour,relax_S,relax_W)
+            S,W = apply_boundary_conditions(S,W,h,beamfront,beamback,beamtop)
+
+    else:
+        raise ValueError("ordering must be 'lexicographic' or 'red-black'")
+
+    return S,W
+
+
+
+def relative_change(grid,snapshot):
+    """This function finds the relative change in a solution grid since a snapshot of it was taken.
+    This is the same as np.linalg.norm(grid - snapshot)/np.linalg.norm(grid), but the change is written over the
+    snapshot instead of into a new grid.
+
+    Args:
+        grid: Stream or vorticity grid - a 2D numpy array.
+        snapshot: A copy of the grid from before the sweep - a 2D numpy array, overwritten with the change.
+
+    Returns:
+        change: The relative change in the grid - a float.
+
+    """
+    difference = np.subtract(grid,snapshot,out=snapshot).ravel()
+    values = grid.ravel()
+
+    change = np.sqrt(difference.dot(difference))/np.sqrt(values.dot(values))
+
+    return change
+
+
+
+def tune_relaxation(relax_S,relax_W,S_err,W_err,R,window=20):
+    """This function adjusts the relaxation factors from the observed ratio of residual errors between sweeps.
+
+    Every window sweeps, the average ratio of the residual errors over the second half of the window is found,
+    leaving the first half for the iteration to settle after the last change.
+    If either residual is growing, both factors are backed off towards under-relaxation.
+    Otherwise the stream factor is moved halfway towards the optimal SOR factor estimated from its ratio (Carre's method),
+    and the vorticity factor is raised by a small step. The vorticity update is not over-relaxed when R > 50,
+    as the convection term then dominates and the update is easily made unstable.
+    Between windows, the factors are backed off straight away if the vorticity residual jumps by a factor of 10.
+
+    Args:
+        relax_S: The current relaxation factor for the stream function update.
+        relax_W: The current relaxation factor for the vorticity update.
+        S_err: List of the residual errors for each iteration of the stream function grid.
+        W_err: List of the residual errors for each iteration of the vorticity function grid.
+        R: Grid Reynolds number.
+        window: The number of sweeps between adjustments.
+
+    Returns:
+        relax_S: The adjusted relaxation factor for the stream function update - a float between 1-1.95.
+        relax_W: The adjusted relaxation factor for the vorticity update - a float between 0.2-1.2.
+
+    """
+    sweeps = len(S_err)
+
+    # Wait until there are two full windows of residuals
+    if sweeps < 2*window:
+        return relax_S,relax_W
+
+    jumped = W_err[-1] > 10*min(W_err[-window:])
+    if sweeps % window != 0 and not jumped:
+        return relax_S,relax_W
+
+    # Average ratio of residuals between sweeps over the second half of the window
+    half = window//2
+    ratio_S = (S_err[-1]/S_err[-1-half])**(1/half)
+    ratio_W = (W_err[-1]/W_err[-1-half])**(1/half)
+
+    # Back off if either residual is growing
+    if jumped or ratio_S >= 1 or ratio_W >= 1:
+        relax_S = 1 + 0.8*(relax_S - 1)
+        relax_W = max(0.2, 0.8*relax_W)
+        return relax_S,relax_W
+
+    # Estimate the optimal SOR factor from the observed ratio, mu is the spectral radius of the Jacobi iteration
+    mu_squared = (ratio_S + relax_S - 1)**2/(ratio_S*relax_S**2)
+    if mu_squared < 1:
+        relax_opt = 2/(1 + math.sqrt(1 - mu_squared))
+        if relax_opt > relax_S:
+            relax_S = min(1.95, relax_S + 0.5*(relax_opt - relax_S))
+
+    # Raise the vorticity factor
+    if R > 50:
+        relax_W = min(1.0, relax_W + 0.05)
+    else:
+        relax_W = min(1.2, relax_W + 0.05)
+
+    return relax_S,relax_W
+
+
+def check_divergence(error,best_error,growth=100):
+    """This function checks whether the iteration is diverging from the relative error of the last checked sweep.
+    The iteration is diverging if the error is not finite, e.g. the grids hold nan or inf values, or if the error has
+    grown by more than a factor of growth since the smallest error of the run. Converging runs can have small bumps in
+    their errors, but a blow up grows them by orders of magnitude within a few sweeps.
+
+    Args:
+        error: The larger of the stream and vorticity relative errors of the last checked sweep.
+        best_error: The smallest error of the run so far, inf if there is none yet.
+        growth: The factor the error must grow by to count as diverging.
+
+    Returns:
+        diverging: True if the iteration is diverging.
+
+    """
+    diverging = not math.isfinite(error) or error > growth*best_error
+
+    return diverging
+
+
+def damp_relaxation(relax_S,relax_W):
+    """This function strengthens the under-relaxation after the iteration has diverged.
+    The vorticity factor is halved, as the convection term of the vorticity update is what makes the sweeps unstable
+    at high Reynolds numbers, and the stream factor is brought down to 1 so the stream update is not over-relaxed.
+
+    Args:
+        relax_S: The relaxation factor for the stream function update.
+        relax_W: The relaxation factor for the vorticity update.
+
+    Returns:
+        relax_S: The damped relaxation factor for the stream function update - at most 1.
+        relax_W: The damped relaxation factor for the vorticity update - half the input.
+
+    """
+    relax_S = min(relax_S,1)
+    relax_W = relax_W/2
+
+    return relax_S,relax_W
@@ -0,0 +1,55 @@
+"""These tests check that the batch functions give the same results as solving each case on its own with solve."""
+import numpy as np
+import pytest
+from Results_File import solve
+from Batch_File import get_chains, run_chain, run_stack
+
+settings = {'n': 16, 'val_S': 0.5, 'val_W': -1, 'max_sweeps': 2000, 'tol': 1e-5, 'start_beam_at': 0.15,
+            'prop_width': 0.08, 'prop_height': 0.14, 'ordering': 'red-black'}
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+def test_diverged_case_not_converged():
+    """This test checks a case that diverges and gives up returns finite grids, but errors that are not within tol."""
+    S, W, x, y, beamfront, beamback, beamtop, S_err, W_err = solve(**settings, Rey=30000, max_restarts=1)[:9]
+
+    assert np.all(np.isfinite(S)) and np.all(np.isfinite(W))
+    assert not (S_err[-1] <= settings['tol'] and W_err[-1] <= settings['tol'])
+    assert len(S_err) < settings['max_sweeps']
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+def test_chain_does_not_start_from_diverged_case():
+    """This test checks the case after one that gave up in a chain starts from the initialised grids."""
+    cases = [dict(settings, Rey=30000, max_restarts=1, guard_every=5),
+             dict(settings, Rey=31000, max_restarts=1, guard_every=5)]
+
+    results = run_chain(cases)
+    expected = solve(**cases[1])
+
+    np.testing.assert_array_equal(results[1]['S'], expected[0])
+    np.testing.assert_array_equal(results[1]['W'], expected[1])
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+def test_stack_matches_solve():
+    """This test checks each case of a stack, including cases that diverge, has the same result as with solve."""
+    cases = [dict(settings, Rey=100), dict(settings, Rey=15000), dict(settings, Rey=40000)]
+
+    for case, result in zip(cases, run_stack(cases)):
+        expected = solve(**case)
+        np.testing.assert_array_equal(result['S'], expected[0])
+        np.testing.assert_array_equal(result['W'], expected[1])
+        np.testing.assert_array_equal(result['S_err'], expected[7])
+
+
+def test_chains_with_obstacles():
+    """This test checks cases with list or mask arguments, such as obstacles, are grouped into chains."""
+    solid = np.zeros((34, 17), dtype=bool)
+    solid[10:12, 0:3] = True
+    cases = [dict(settings, Rey=200, obstacles=[(0.15, 0.08, 0.14)]),
+             dict(settings, Rey=100, obstacles=[[0.15, 0.08, 0.14]]),
+             dict(settings, Rey=100, obstacles=solid), dict(settings, Rey=200, obstacles=solid.copy()),
+             dict(settings, Rey=100, obstacles=[(0.5, 0.05, 0.3)])]
+
+    assert get_chains(cases) == [[1, 0], [2, 3], [4]]
@@ -0,0 +1,20 @@
+"""These tests check the benchmark records count the work and memory of every part of a solve."""
+import pytest
+from Results_File import solve
+from Benchmark_File import bench_kernels, bench_solve, resource_available, settings
+
+
+def test_coarse_sweeps_counted():
+    """This test checks the sweeps on the coarser grids are counted by the grid points they update."""
+    record = bench_solve(32, 100, 'coarse', 3000)
+    coarse_sweeps = len(solve(n=16, Rey=100, max_sweeps=3000, coarse_levels=1, ordering='red-black', **settings)[7])
+
+    # The finest grid is 66 by 33 points and the next coarser grid 34 by 17
+    assert record['equivalent_sweeps'] > record['sweeps'] + coarse_sweeps*34*17/(66*33)
+    assert record['time_per_sweep_point'] == pytest.approx(record['wall_time']/(record['equivalent_sweeps']*66*33))
+
+
+def test_kernel_memory_measured():
+    """This test checks the kernel records hold their peak memory where it can be measured."""
+    for record in bench_kernels(16, 1):
+        assert (record['peak_memory'] is not None) == resource_available
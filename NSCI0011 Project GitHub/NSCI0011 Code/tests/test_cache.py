@@ -0,0 +1,77 @@
+"""These tests check that the cache returns the result of a run with the same arguments, and only that result."""
+import os
+import numpy as np
+import pytest
+from Results_File import main, solve
+from Plot_module.Plotting_functions import shape_sol
+from Upd_module.Cache_functions import get_key, load_result, save_result, evict
+
+settings = {'n': 16, 'val_S': 0.5, 'val_W': -1, 'max_sweeps': 3000, 'tol': 1e-5, 'start_beam_at': 0.15,
+            'prop_width': 0.08, 'prop_height': 0.14, 'ordering': 'red-black'}
+
+
+def solve_cached(cache, Rey, warm_start=False, **options):
+    """This function runs main with the cache, and returns the stream grid it solved or loaded."""
+    output = os.path.join(str(cache) + '_output', str(Rey) + '_' + str(warm_start) + '.npz')
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    main(**dict(settings, **options), Rey=Rey, cache=str(cache), warm_start=warm_start, output=output,
+         show_plots=False)
+    with np.load(output) as data:
+        return data['S_sol']
+
+
+def test_warm_start_not_loaded_for_cold_run(tmp_path):
+    """This test checks a warm started result is reused by the same warm start, but not by a run from scratch."""
+    cache = tmp_path / 'cache'
+    solve_cached(cache, 100)
+    warm = solve_cached(cache, 120, warm_start=True)
+
+    # The warm started result is loaded again for the same warm start
+    np.testing.assert_array_equal(solve_cached(cache, 120, warm_start=True), warm)
+
+    # A run from scratch is solved again, rather than loading the warm started result
+    cold = solve_cached(cache, 120)
+    S, W = solve(**settings, Rey=120)[:2]
+    np.testing.assert_array_equal(cold, shape_sol(S, W)[0])
+    assert not np.array_equal(warm, cold)
+
+
+def test_round_trip_and_eviction(tmp_path):
+    """This test checks a saved result loads unchanged, and the least recently used result is removed first."""
+    result = {'S': np.arange(6.0).reshape(3, 2), 'W': -np.arange(6.0).reshape(3, 2), 'x': np.arange(3.0),
+              'y': np.arange(2.0), 'beamfront': 1, 'beamback': 2, 'beamtop': 1, 'S_err': np.array([1e-3]),
+              'W_err': np.array([1e-3]), 'relax_S': 1.0, 'relax_W': 0.5}
+    cache = str(tmp_path)
+
+    assert save_result(cache, {'Rey': 1, 'tol': 1e-2}, result, 10**9)
+    loaded = load_result(cache, {'Rey': 1, 'tol': 1e-2})
+    for name, value in result.items():
+        np.testing.assert_array_equal(loaded[name], value)
+    assert load_result(cache, {'Rey': 2, 'tol': 1e-2}) is None
+
+    # Mark the first result as used long ago, and keep room for one result only
+    save_result(cache, {'Rey': 2, 'tol': 1e-2}, result, 10**9)
+    os.utime(os.path.join(cache, get_key({'Rey': 1, 'tol': 1e-2}) + '.npz'), (0, 0))
+    evict(cache, sum(os.path.getsize(os.path.join(cache, name)) for name in os.listdir(cache))//2 + 1)
+
+    assert load_result(cache, {'Rey': 1, 'tol': 1e-2}) is None
+    assert load_result(cache, {'Rey': 2, 'tol': 1e-2}) is not None
+
+
+def test_numbers_of_either_type_share_key():
+    """This test checks a Reynolds number given as an int, as from the API, and as a float, as from the command line,
+    find the same result."""
+    assert get_key({'n': 16, 'Rey': 1000}) == get_key({'n': 16.0, 'Rey': 1000.0})
+    assert get_key({'Rey': 1000, 'auto_relax': True}) != get_key({'Rey': 1000, 'auto_relax': 1})
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+def test_unconverged_result_not_cached(tmp_path):
+    """This test checks a run that uses up its sweeps, or diverges and gives up, is not saved, so it is never loaded
+    or used as a warm start."""
+    cache = tmp_path / 'cache'
+    solve_cached(cache, 100, max_sweeps=50)
+    assert not os.path.exists(cache) or not os.listdir(cache)
+
+    solve_cached(cache, 30000, max_restarts=1)
+    assert not os.path.exists(cache) or not os.listdir(cache)
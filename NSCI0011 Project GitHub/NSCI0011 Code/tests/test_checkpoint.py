@@ -0,0 +1,48 @@
+"""These tests check that a run resumed from a checkpoint has the same results as the run it continues."""
+import numpy as np
+import pytest
+from Results_File import solve
+
+# A small case that diverges and is restarted at sweeps 9, 20 and 35
+diverging = {'n': 16, 'Rey': 15000, 'val_S': 0.5, 'val_W': -1, 'max_sweeps': 300, 'tol': 1e-4,
+             'start_beam_at': 0.15, 'prop_width': 0.08, 'prop_height': 0.14, 'ordering': 'red-black'}
+
+
+def interrupt_at(sweep):
+    """This function makes a callback that stops the run once the given sweep has been checked."""
+    def callback(record):
+        if record['event'] == 'sweep' and record['sweep'] >= sweep:
+            raise KeyboardInterrupt
+    return callback
+
+
+def solve_resumed(path, case, sweep, checkpoint_every):
+    """This function runs a case until the given sweep, and then resumes it from its last checkpoint."""
+    with pytest.raises(KeyboardInterrupt):
+        solve(**case, checkpoint=path, checkpoint_every=checkpoint_every, callback=interrupt_at(sweep))
+
+    return solve(**case, checkpoint=path, checkpoint_every=checkpoint_every, resume=True)
+
+
+def assert_same(result, expected):
+    """This function checks two results of solve are the same, including the nan errors of unchecked sweeps."""
+    for value, expected_value in zip(result, expected):
+        np.testing.assert_array_equal(value, expected_value)
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+def test_resume_after_restarts(tmp_path):
+    """This test checks a run interrupted between its restarts continues with the same guard and restarts left."""
+    expected = solve(**diverging, checkpoint=str(tmp_path / 'full'), checkpoint_every=10)
+    result = solve_resumed(str(tmp_path / 'resumed'), diverging, 25, 10)
+
+    assert_same(result, expected)
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+def test_resume_without_checkpoints_matches(tmp_path):
+    """This test checks that saving checkpoints does not change the result of a run."""
+    expected = solve(**diverging)
+    result = solve_resumed(str(tmp_path / 'resumed'), diverging, 25, 10)
+
+    assert_same(result, expected)
@@ -0,0 +1,39 @@
+"""These tests check the multigrid stream solve, and that the sweeps leave its stream factor alone."""
+import numpy as np
+import pytest
+from Results_File import solve
+from Init_module.Initialising_functions import initialise
+from Upd_module.Updating_functions import get_beam
+
+pytest.importorskip('scipy')
+from Upd_module.Multigrid_functions import build_levels, bound_stream, find_residual, v_cycle, fmg_cycle
+
+
+def reduction(n, cycle):
+    """This function finds the factor one cycle cuts the residual by, for a random vorticity grid."""
+    S, W, R, x, y, h = initialise(n, 1000, 0.5, -1)
+    beamfront, beamback, beamtop = get_beam(0.15, 0.08, 0.14, x, y)
+    levels = build_levels(S.shape, h, beamfront, beamback, beamtop)
+    W[1:-1, 1:-1] = np.random.default_rng(0).standard_normal(W[1:-1, 1:-1].shape)
+
+    unknown = levels[0]['unknown']
+    res = find_residual(bound_stream(S, h, beamfront, beamback, beamtop), W, h)[unknown]
+    E = cycle(res, levels)
+
+    return np.linalg.norm(res - levels[0]['A'] @ E)/np.linalg.norm(res)
+
+
+@pytest.mark.parametrize('n', [30, 60])
+def test_fmg_cycle(n):
+    """This test checks a full multigrid cycle cuts the residual by far more than a V-cycle, on grids of any size."""
+    assert reduction(n, fmg_cycle) < 0.005
+    assert reduction(n, fmg_cycle) < reduction(n, v_cycle)/10
+
+
+def test_stream_factor_not_tuned():
+    """This test checks the stream factor, which the multigrid solve does not use, is not tuned."""
+    result = solve(30, 1000, 0.5, -1, 3000, 1e-6, 0.15, 0.08, 0.14, ordering='red-black', relax_S=1.3,
+                   auto_relax=True, stream_solver='multigrid')
+
+    assert result[9] == 1.3
+    assert result[7][-1] <= 1e-6 and result[8][-1] <= 1e-6
@@ -0,0 +1,34 @@
+"""These tests check the solid masks of the obstacles, which must all lie on the centreline streamline."""
+import numpy as np
+import pytest
+from Init_module.Initialising_functions import init_grid
+from Upd_module.Obstacle_functions import get_mask
+
+S, W, R, x, y, h = init_grid(16, 100)
+
+
+def test_rectangles_on_centreline():
+    """This test checks rectangles, which always start on the centreline, give their solid points."""
+    solid = get_mask(S.shape, x, y, [(0.15, 0.08, 0.14), (0.5, 0.05, 0.3)])
+
+    assert np.all(solid[:, 0] == np.any(solid, axis=1))
+
+
+def test_joined_mask_on_centreline():
+    """This test checks a mask whose points reach the centreline through other solid points is kept."""
+    solid = np.zeros(S.shape, dtype=bool)
+    solid[10, 0:6] = True
+    solid[10:15, 5] = True
+
+    np.testing.assert_array_equal(get_mask(S.shape, x, y, solid), solid)
+
+
+def test_detached_mask():
+    """This test checks a mask with an obstacle away from the centreline, which would be wrongly held at S=0, is
+    rejected."""
+    solid = np.zeros(S.shape, dtype=bool)
+    solid[10, 0:4] = True
+    solid[20:24, 5:8] = True
+
+    with pytest.raises(ValueError):
+        get_mask(S.shape, x, y, solid)
@@ -0,0 +1,43 @@
+"""These tests pin down the difference between the solutions the lexicographic and red-black sweeps converge to."""
+import numpy as np
+import pytest
+from Results_File import solve
+from Upd_module.Updating_functions import apply_sweep
+
+settings = {'n': 16, 'Rey': 100, 'val_S': 0.5, 'val_W': -1, 'max_sweeps': 20000, 'tol': 1e-8, 'start_beam_at': 0.15,
+            'prop_width': 0.08, 'prop_height': 0.14}
+
+
+@pytest.fixture(scope='module')
+def solutions():
+    """This fixture solves the case with each ordering."""
+    return {ordering: solve(**settings, ordering=ordering) for ordering in ('lexicographic', 'red-black')}
+
+
+def sweep_change(result, ordering):
+    """This function finds the relative change one sweep of the given ordering makes to converged vorticity grids."""
+    S, W, x, y, beamfront, beamback, beamtop = result[:7]
+    h = y[1] - y[0]
+    S_new, W_new = apply_sweep(S.copy(), W.copy(), settings['Rey']*h, settings['n'], h, beamfront, beamback, beamtop,
+                               ordering)
+
+    return np.linalg.norm(W_new - W)/np.linalg.norm(W)
+
+
+def test_each_ordering_has_its_own_fixed_point(solutions):
+    """This test checks the grids each ordering converges to are left by its own sweep, but not by the other's."""
+    assert sweep_change(solutions['lexicographic'], 'lexicographic') < 1e-6
+    assert sweep_change(solutions['red-black'], 'red-black') < 1e-6
+    assert sweep_change(solutions['lexicographic'], 'red-black') > 1e-2
+    assert sweep_change(solutions['red-black'], 'lexicographic') > 1e-2
+
+
+def test_difference_at_back_corner(solutions):
+    """This test checks the vorticity grids differ by about 30% at n = 16, most at the back corner of the beam, and
+    the stream grids by about 5%."""
+    S_lex, W_lex, x, y, beamfront, beamback, beamtop = solutions['lexicographic'][:7]
+    S_rb, W_rb = solutions['red-black'][:2]
+
+    assert 0.25 < np.linalg.norm(W_lex - W_rb)/np.linalg.norm(W_rb) < 0.4
+    assert 0.02 < np.linalg.norm(S_lex - S_rb)/np.linalg.norm(S_rb) < 0.08
+    assert np.unravel_index(np.argmax(np.abs(W_lex - W_rb)), W_rb.shape) == (beamback, beamtop)
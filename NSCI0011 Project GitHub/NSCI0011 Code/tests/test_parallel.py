@@ -0,0 +1,44 @@
+"""These tests check that the red-black sweeps split across worker processes give the same grids as one process."""
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+from Results_File import solve
+from Upd_module.Parallel_functions import solve_parallel
+
+settings = {'n': 16, 'Rey': 100, 'val_S': 0.5, 'val_W': -1, 'max_sweeps': 200, 'tol': 1e-9, 'start_beam_at': 0.15,
+            'prop_width': 0.08, 'prop_height': 0.14, 'ordering': 'red-black'}
+
+
+@pytest.mark.parametrize('workers', [2, 3])
+def test_workers_match_red_black(workers):
+    """This test checks the grids after the sweeps of each worker count are the same as those of serial sweeps."""
+    expected = solve(**settings)
+    result = solve(**settings, workers=workers)
+
+    np.testing.assert_array_equal(result[0], expected[0])
+    np.testing.assert_array_equal(result[1], expected[1])
+    assert len(result[7]) == len(expected[7])
+
+
+def test_end_strips_too_small():
+    """This test checks the grids are not split so an end strip reads a row another worker writes."""
+    S = np.zeros((6, 3))
+    with pytest.raises(ValueError):
+        solve_parallel(S, S.copy(), 1, 2, 0.5, 2, 3, 1, 10, 1e-6, 3)
+
+
+def test_workers_after_numba_sweeps():
+    """This test checks the workers start and the interpreter exits after Numba's parallel sweeps have run."""
+    pytest.importorskip('numba')
+    script = ('from Results_File import solve\n'
+              'if __name__ == "__main__":\n'
+              '    settings = ' + repr(settings) + '\n'
+              '    solve(**settings, backend="numba")\n'
+              '    solve(**settings, workers=2)\n')
+
+    folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join([folder] + sys.path))
+    completed = subprocess.run([sys.executable, '-c', script], env=environment, timeout=120)
+    assert completed.returncode == 0
@@ -0,0 +1,27 @@
+"""These tests check that the results read for rendering carry the solid mask of their obstacles."""
+import glob
+import os
+import numpy as np
+from Results_File import main
+from Render_File import read_solution
+
+settings = {'n': 16, 'Rey': 100, 'val_S': 0.5, 'val_W': -1, 'max_sweeps': 3000, 'tol': 1e-5, 'start_beam_at': 0.15,
+            'prop_width': 0.08, 'prop_height': 0.14, 'ordering': 'red-black', 'obstacles': [(0.3, 0.1, 0.3)]}
+
+
+def test_cached_obstacles_rendered(tmp_path):
+    """This test checks a cached obstacle run is read with the same solid mask as its saved output, also when it was
+    cached without the mask."""
+    cache = str(tmp_path / 'cache')
+    output = str(tmp_path / 'output.npz')
+    main(**settings, cache=cache, output=output, show_plots=False)
+
+    expected = read_solution(output)['solid_sol']
+    cached_path, = glob.glob(os.path.join(cache, '*.npz'))
+    np.testing.assert_array_equal(read_solution(cached_path)['solid_sol'], expected)
+
+    # A result cached without its mask has it rebuilt from the saved rectangles
+    with np.load(cached_path) as data:
+        arrays = {name: data[name] for name in data.files if name != 'solid'}
+    np.savez(cached_path, **arrays)
+    np.testing.assert_array_equal(read_solution(cached_path)['solid_sol'], expected)
@@ -0,0 +1,38 @@
+"""These tests check that the telemetry of a run is ended and closed however the run stops."""
+import json
+import pytest
+from Results_File import solve
+
+settings = {'n': 16, 'Rey': 100, 'val_S': 0.5, 'val_W': -1, 'max_sweeps': 300, 'tol': 1e-9, 'start_beam_at': 0.15,
+            'prop_width': 0.08, 'prop_height': 0.14}
+
+
+def read_records(path):
+    """This function reads the records of a JSON Lines telemetry file."""
+    with open(path) as file:
+        return [json.loads(line) for line in file]
+
+
+def test_interrupted_run_ended(tmp_path):
+    """This test checks a run stopped by an exception still writes its end record and closes the file."""
+    path = str(tmp_path / 'run.jsonl')
+
+    def callback(record):
+        if record['event'] == 'sweep' and record['sweep'] >= 5:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        solve(**settings, telemetry=path, callback=callback)
+
+    end = read_records(path)[-1]
+    assert end['event'] == 'end' and not end['converged']
+
+
+def test_run_without_sweeps_ended(tmp_path):
+    """This test checks a run with no sweeps left, as when resumed after its last sweep, ends its telemetry."""
+    path = str(tmp_path / 'run.jsonl')
+    result = solve(**dict(settings, max_sweeps=0), telemetry=path)
+
+    assert len(result[7]) == 0
+    end = read_records(path)[-1]
+    assert end['event'] == 'end' and end['sweeps'] == 0 and not end['converged']